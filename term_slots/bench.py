@@ -0,0 +1,456 @@
+"""Renderer microbenchmarks over synthetic scenes and terminal sizes.
+
+Run with `python -m term_slots.bench -o run.json` and compare two runs with
+`python -m term_slots.bench --compare base.json run.json`.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable
+
+import numpy as np
+from blessed import Terminal
+
+from term_slots.config import Config
+from term_slots.effects import FrameUniforms
+from term_slots.headless import create_headless_backend, headless_tick
+from term_slots.input import Action, resolve_action
+from term_slots.main import create_context
+from term_slots.playing_card import FULL_DECK
+from term_slots.popup_text import TextPopup, render_all_text_popups
+from term_slots.renderer import (
+    COLOR_ALLOC_STATS,
+    FRAME_BUFFER,
+    RGBA,
+    STYLE_CACHE,
+    ColorMode,
+    DrawBatch,
+    DrawCall,
+    Layer,
+    RichText,
+    Screen,
+    buffer_diff,
+    compile_draw_calls,
+    composite_layers,
+    create_buffer,
+    fill_screen_background,
+    flush_diffs,
+    print_at,
+    set_color_mode,
+)
+from term_slots.slots import Column, render_column
+
+DEFAULT_SIZES: list[tuple[int, int]] = [(80, 24), (160, 48), (240, 72), (400, 120)]
+DEFAULT_FRAMES: int = 20
+# Screen the game itself is run on to count its color allocations
+GAME_SIZE: tuple[int, int] = (120, 40)
+# Every scene is timed this many times, the fastest repeat is reported
+DEFAULT_REPEATS: int = 5
+# Relative slowdown past which `compare_runs` reports a regression, results whose
+# repeats are noisier than this use their own noise instead
+DEFAULT_REGRESSION_THRESHOLD: float = 0.25
+# Bytes per frame are deterministic, so any real growth counts
+DEFAULT_BYTES_REGRESSION_THRESHOLD: float = 0.01
+
+# Timed steps of every frame, in the order they run
+STEPS: tuple[str, ...] = ("rasterize", "buffer_diff", "flush_diffs")
+
+
+@dataclass
+class SceneResult:
+    scene: str
+    width: int
+    height: int
+    # Fastest repeat, every step and the total are minimums over the repeats
+    ms_per_frame: dict[str, float]
+    # Relative difference between the median and the fastest repeat
+    noise: float
+    bytes_per_frame: float
+
+
+# A scene returns the layers of frame `frame_index` on a `width` x `height` screen
+Scene = Callable[[int, int, int], list[Layer]]
+
+
+# --- Scenes ---
+
+
+def scene_static(width: int, height: int, frame_index: int) -> list[Layer]:
+    """The same text every frame, after the first frame nothing is written."""
+    draw_calls: list[DrawCall] = [
+        DrawCall(2, y, RichText(f"Static line {y}".ljust(width - 4, "."), RGBA.LIGHT_BLUE))
+        for y in range(1, height - 1, 2)
+    ]
+    return [Layer([compile_draw_calls(draw_calls)])]
+
+
+def scene_churn(width: int, height: int, frame_index: int) -> list[Layer]:
+    """Every cell changes its character and colors every frame."""
+    draw_calls: list[DrawCall] = []
+    for y in range(height):
+        shift: int = (frame_index + y) % 26
+        text: str = "".join(chr(ord("a") + (shift + x) % 26) for x in range(width))
+        hue: float = (frame_index * 0.05 + y / height) % 1.0
+        fg = RGBA(hue, 1.0 - hue, 0.5)
+        bg = RGBA(1.0 - hue, 0.2, hue)
+        draw_calls.append(DrawCall(0, y, RichText(text, fg, bg)))
+    return [Layer([compile_draw_calls(draw_calls)])]
+
+
+def scene_reels(width: int, height: int, frame_index: int) -> list[Layer]:
+    """Slot columns spinning across the whole screen."""
+    batches: list[DrawBatch] = []
+    uniforms = FrameUniforms(frame_index / 60.0)
+    for col_x in range(2, width - 4, 5):
+        for col_y in range(4, height - 4, 9):
+            column = Column(
+                cursor=-frame_index * 0.8 + col_x + col_y,
+                cards=FULL_DECK,
+                spin_duration=3.0,
+                spin_time_remaining=1.0,
+            )
+            batches.append(render_column(col_x, col_y, column, uniforms, True, False))
+    return [Layer(batches)]
+
+
+def scene_hud(width: int, height: int, frame_index: int) -> list[Layer]:
+    """A few short counters change every frame, the rest of the screen is never drawn to."""
+    fps_text: str = f"{60.0 + frame_index % 7:5.1f} FPS"
+    draw_calls: list[DrawCall] = [
+        DrawCall(5, 12, RichText(f"Spin cost: {10 + frame_index // 10}", RGBA.WHITE)),
+        DrawCall(5, 13, RichText(f"Score: {frame_index * 25}", RGBA.LIGHT_BLUE)),
+        DrawCall(5, 14, RichText(f"Coins: {500 - frame_index}", RGBA.GOLD)),
+        DrawCall(width - len(fps_text) - 1, 1, RichText(fps_text, RGBA.GREEN)),
+    ]
+    return [Layer([compile_draw_calls(draw_calls)])]
+
+
+def scene_popups(width: int, height: int, frame_index: int) -> list[Layer]:
+    """Many overlapping text popups fading in and out."""
+    rng = random.Random(0)
+    popups: list[TextPopup] = []
+    for _ in range(width * height // 40):
+        popups.append(
+            TextPopup(
+                rng.randrange(0, width - 8),
+                rng.randrange(0, height),
+                RichText("+10 coins", RGBA.GOLD, RGBA.BLACK),
+                duration_sec=rng.uniform(0.5, 2.0),
+                start_timestamp=rng.uniform(0.0, 2.0),
+            )
+        )
+    game_time: float = math.fmod(frame_index / 60.0, 2.0) + 0.5
+    return render_all_text_popups(popups, game_time)
+
+
+SCENES: dict[str, Scene] = {
+    "static": scene_static,
+    "hud": scene_hud,
+    "churn": scene_churn,
+    "reels": scene_reels,
+    "popups": scene_popups,
+}
+
+
+# --- Running ---
+
+
+def bench_create_buffer(width: int, height: int, repeat: int = 50) -> float:
+    """Returns the mean time of `create_buffer` in milliseconds."""
+    return _mean_ms(lambda: create_buffer(width, height), repeat)
+
+
+def bench_fill_screen_background(width: int, height: int, repeat: int = 50) -> float:
+    """Returns the mean time of `fill_screen_background` in milliseconds."""
+    buf = create_buffer(width, height)
+    return _mean_ms(lambda: fill_screen_background(buf, RGBA.BLACK), repeat)
+
+
+def bench_print_at(term: Terminal, width: int, height: int, repeat: int = 5) -> float:
+    """Returns the mean time in milliseconds of filling every row through `print_at`."""
+    screen = Screen(width, height)
+    segments: list[RichText] = [
+        RichText("Coins: ", RGBA.WHITE),
+        RichText("x" * (width - 7), RGBA.GOLD, RGBA.BLACK),
+    ]
+
+    def fill_rows() -> None:
+        for y in range(height):
+            print_at(term, screen, 0, y, segments)
+
+    return _mean_ms(fill_rows, repeat)
+
+
+def count_game_colors(frames: int, color_mode: ColorMode) -> dict[str, float]:
+    """Counts the `RGBA` instances built per frame of a slots spin, running `tick` headless.
+
+    Every intern hit would be an allocation too without interning.
+    """
+    width, height = GAME_SIZE
+    backend = create_headless_backend(width, height, color_mode, emulate=False)
+    ctx = create_context(width, height, random.Random(0))
+    config = Config()
+    resolve_action(ctx, Action.SPIN_SLOTS, config)
+
+    # The first frame interns the colors of the frame once
+    headless_tick(backend, ctx, config, 1.0 / 60.0)
+    allocated: int = COLOR_ALLOC_STATS.allocated
+    intern_hits: int = COLOR_ALLOC_STATS.intern_hits
+    for _ in range(frames):
+        headless_tick(backend, ctx, config, 1.0 / 60.0)
+
+    allocs_per_frame: float = (COLOR_ALLOC_STATS.allocated - allocated) / frames
+    intern_hits_per_frame: float = (COLOR_ALLOC_STATS.intern_hits - intern_hits) / frames
+    return {
+        "allocs_per_frame": allocs_per_frame,
+        "intern_hits_per_frame": intern_hits_per_frame,
+        "allocs_per_frame_without_interning": allocs_per_frame + intern_hits_per_frame,
+    }
+
+
+def time_scene(
+    term: Terminal,
+    scene_name: str,
+    width: int,
+    height: int,
+    frames: int,
+) -> tuple[np.ndarray, int]:
+    """Renders `frames` frames of a scene, returns the seconds per step and the bytes written."""
+    scene: Scene = SCENES[scene_name]
+    screen = Screen(width, height)
+    # Like the game, the background is filled once and the blank template
+    # restores it after every diff, so only drawn cells are damaged
+    fill_screen_background(screen.new_buffer, RGBA.BLACK)
+    totals: np.ndarray = np.zeros(len(STEPS), dtype=np.float64)
+    bytes_written: int = 0
+
+    # The first frame paints the whole screen and isn't representative
+    for frame_index in range(-1, frames):
+        timings: list[float] = [time.perf_counter()]
+
+        composite_layers(screen.new_buffer, scene(width, height, frame_index))
+        timings.append(time.perf_counter())
+
+        diffs = buffer_diff(screen)
+        timings.append(time.perf_counter())
+
+        flush_diffs(term, diffs)
+        timings.append(time.perf_counter())
+
+        if frame_index >= 0:
+            totals += np.diff(timings)
+            bytes_written += len(FRAME_BUFFER)
+
+    return totals, bytes_written
+
+
+def run_benchmarks(
+    sizes: list[tuple[int, int]],
+    scene_names: list[str],
+    frames: int,
+    color_mode: ColorMode = ColorMode.TRUECOLOR,
+    repeats: int = DEFAULT_REPEATS,
+) -> dict[str, object]:
+    """Runs every scene at every size `repeats` times, frames are flushed into the null device.
+
+    Every repeat goes through the whole suite before the next one starts, so
+    a slowdown of the machine costs one repeat of each result instead of
+    every repeat of a few.
+    """
+    set_color_mode(STYLE_CACHE, color_mode)
+    cases: list[tuple[str, int, int]] = [
+        (scene_name, width, height) for width, height in sizes for scene_name in scene_names
+    ]
+    # Seconds per step of every repeat of every case, shape (cases, repeats, len(STEPS))
+    totals: np.ndarray = np.zeros((len(cases), repeats, len(STEPS)), dtype=np.float64)
+    bytes_written: list[int] = [0] * len(cases)
+
+    with open(os.devnull, "w") as null_sink:
+        term = Terminal(kind="xterm-256color", stream=null_sink, force_styling=True)
+        term.number_of_colors = 1 << 24
+
+        for repeat in range(repeats):
+            for case_index, (scene_name, width, height) in enumerate(cases):
+                totals[case_index, repeat], bytes_written[case_index] = time_scene(
+                    term, scene_name, width, height, frames
+                )
+
+        print_at_ms: dict[str, float] = {
+            f"{width}x{height}": bench_print_at(term, width, height) for width, height in sizes
+        }
+
+    results: list[SceneResult] = [
+        _scene_result(
+            scene_name,
+            width,
+            height,
+            totals[case_index] / frames,
+            bytes_written[case_index] / frames,
+        )
+        for case_index, (scene_name, width, height) in enumerate(cases)
+    ]
+
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "color_mode": color_mode.name,
+        "frames": frames,
+        "repeats": repeats,
+        "create_buffer_ms": {
+            f"{width}x{height}": bench_create_buffer(width, height) for width, height in sizes
+        },
+        "fill_screen_background_ms": {
+            f"{width}x{height}": bench_fill_screen_background(width, height)
+            for width, height in sizes
+        },
+        "print_at_ms": print_at_ms,
+        "game_colors": count_game_colors(frames, color_mode),
+        "results": [asdict(result) for result in results],
+    }
+
+
+def compare_runs(
+    base: dict[str, object],
+    head: dict[str, object],
+    threshold: float = DEFAULT_REGRESSION_THRESHOLD,
+    bytes_threshold: float = DEFAULT_BYTES_REGRESSION_THRESHOLD,
+) -> tuple[list[str], bool]:
+    """Returns a report line per scene and size found in both runs and whether anything regressed.
+
+    A result regressed when its bytes per frame grew by more than
+    `bytes_threshold` or its total time per frame by more than `threshold`,
+    or by more than the noise of either run's repeats if that's larger.
+    """
+    base_results: dict[tuple[str, int, int], dict] = {
+        (r["scene"], r["width"], r["height"]): r for r in base["results"]
+    }
+
+    header: str = (
+        f"{'scene':<8}{'size':>9}{'base ms':>10}{'head ms':>10}{'change':>9}{'noise':>8}"
+        + f"{'base B':>10}{'head B':>10}{'change':>9}"
+    )
+    lines: list[str] = [header]
+    regressed: bool = False
+
+    for r in head["results"]:
+        key: tuple[str, int, int] = (r["scene"], r["width"], r["height"])
+        if key not in base_results:
+            continue
+        b: dict = base_results[key]
+
+        time_change: float = _relative_change(
+            b["ms_per_frame"]["total"], r["ms_per_frame"]["total"]
+        )
+        bytes_change: float = _relative_change(b["bytes_per_frame"], r["bytes_per_frame"])
+        # Results written before repeats were recorded count as noise free
+        noise: float = max(b.get("noise", 0.0), r.get("noise", 0.0))
+        is_regression: bool = time_change > max(threshold, noise) or bytes_change > bytes_threshold
+        regressed |= is_regression
+
+        lines.append(
+            f"{r['scene']:<8}{r['width']:>4}x{r['height']:<4}"
+            + f"{b['ms_per_frame']['total']:>10.3f}{r['ms_per_frame']['total']:>10.3f}"
+            + f"{time_change:>+9.1%}{noise:>8.1%}"
+            + f"{b['bytes_per_frame']:>10.0f}{r['bytes_per_frame']:>10.0f}{bytes_change:>+9.1%}"
+            + ("  REGRESSION" if is_regression else "")
+        )
+
+    return lines, regressed
+
+
+def _scene_result(
+    scene_name: str,
+    width: int,
+    height: int,
+    seconds_per_frame: np.ndarray,
+    bytes_per_frame: float,
+) -> SceneResult:
+    """Summarizes the per step timings of every repeat, shape (repeats, len(STEPS))."""
+    ms_per_repeat: np.ndarray = seconds_per_frame * 1000.0
+    repeat_totals: np.ndarray = ms_per_repeat.sum(axis=1)
+
+    ms_per_frame: dict[str, float] = dict(zip(STEPS, ms_per_repeat.min(axis=0).tolist()))
+    ms_per_frame["total"] = float(repeat_totals.min())
+    noise: float = _relative_change(float(repeat_totals.min()), float(np.median(repeat_totals)))
+    return SceneResult(scene_name, width, height, ms_per_frame, noise, bytes_per_frame)
+
+
+def _mean_ms(fn: Callable[[], object], repeat: int) -> float:
+    started: float = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000.0
+
+
+def _relative_change(base: float, head: float) -> float:
+    if base == 0.0:
+        return 0.0 if head == 0.0 else math.inf
+    return (head - base) / base
+
+
+def _parse_size(size: str) -> tuple[int, int]:
+    width, height = size.lower().split("x")
+    return int(width), int(height)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-o", "--output", help="write the results to this file instead of stdout")
+    parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES)
+    parser.add_argument(
+        "--repeats", type=int, default=DEFAULT_REPEATS, help="timed runs per scene and size"
+    )
+    parser.add_argument(
+        "--sizes",
+        default=",".join(f"{w}x{h}" for w, h in DEFAULT_SIZES),
+        help="comma separated WIDTHxHEIGHT list",
+    )
+    parser.add_argument("--scenes", default=",".join(SCENES), help="comma separated scene list")
+    parser.add_argument(
+        "--color-mode", choices=[m.name for m in ColorMode], default=ColorMode.TRUECOLOR.name
+    )
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        metavar=("BASE", "HEAD"),
+        help="compare two result files instead of running, exits with 1 on regressions",
+    )
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD)
+    parser.add_argument("--bytes-threshold", type=float, default=DEFAULT_BYTES_REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            base = json.load(f)
+        with open(args.compare[1]) as f:
+            head = json.load(f)
+
+        lines, regressed = compare_runs(base, head, args.threshold, args.bytes_threshold)
+        print("\n".join(lines))
+        sys.exit(1 if regressed else 0)
+
+    run: dict[str, object] = run_benchmarks(
+        [_parse_size(size) for size in args.sizes.split(",")],
+        args.scenes.split(","),
+        args.frames,
+        ColorMode[args.color_mode],
+        args.repeats,
+    )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(run, f, indent=2)
+    else:
+        json.dump(run, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 from dataclasses import dataclass
 
+from term_slots.renderer import ColorMode
+
 
 @dataclass
 class Config:
@@ -11,3 +13,16 @@ class Config:
     slots_spin_geometric_weight: float = 0.3
     slots_after_spin_delay_sec: float = 0.8
     hand_card_x_spacing: int = 1
+    max_fps: float = 144.0
+    # Sinewave highlights only need a reduced frame rate to look smooth
+    highlight_fps: float = 30.0
+    # Longest wait between frames while nothing animates, input still wakes up right away
+    idle_frame_time_sec: float = 0.5
+    # Where the frame timing profile is written on exit, `None` disables the dump
+    profile_dump_path: str | None = None
+    # `None` picks the best mode the terminal reports support for
+    color_mode: ColorMode | None = None
+    # Frame writes as synchronized updates, `None` asks the terminal whether it supports them
+    synchronized_output: bool | None = None
+    # Write frames on a background thread while the next one is simulated
+    pipelined_output: bool = False
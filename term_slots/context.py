@@ -4,10 +4,14 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from term_slots.game_state import GameState
     from term_slots.hand import Hand
+    from term_slots.output import FrameWriter, OutputMonitor
     from term_slots.playing_card import PlayingCard
+    from term_slots.poker_hand import PokerHand
     from term_slots.popup_text import TextPopup
+    from term_slots.profiler import FrameProfiler
     from term_slots.renderer import FPSCounter, RichText, Screen
     from term_slots.slots import Slots
+    from term_slots.terminal_size import TerminalSize
 
 
 @dataclass
@@ -23,7 +27,16 @@ class Context:
     forced_burn_replacement_card: PlayingCard
     all_text_popups: list[TextPopup]
     fps_counter: FPSCounter
+    output_monitor: OutputMonitor
+    terminal_size: TerminalSize
+    profiler: FrameProfiler
     debug_text: str | RichText = ""
+    # Set when frames are written by a background thread, see `Config.pipelined_output`
+    frame_writer: FrameWriter | None = None
+    # Set when the last `tick` skipped rendering because the output was backed up
+    render_skipped: bool = False
+    # Poker hand and coin payout of the last hand played
+    last_played_hand: tuple[PokerHand, int] | None = None
 
 
 def elapsed_fraction(game_time: float, start_timestamp: float, duration: float) -> float:
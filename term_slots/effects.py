@@ -0,0 +1,185 @@
+"""Per-cell colour effects evaluated as array operations over a rectangular region.
+
+An effect is a function over the cells of a region that rewrites their colour
+planes in place, given each cell's row/col offset inside the region and the
+uniforms of the current frame. Anything that only depends on time, such as a
+sinewave pulse, is computed once per frame in `FrameUniforms` and shared by
+every effect that uses it.
+"""
+
+import math
+from dataclasses import dataclass, field
+from typing import Callable
+
+import numpy as np
+
+from term_slots.renderer import RGBA, DrawBatch
+
+
+@dataclass
+class FrameUniforms:
+    """Per-frame values shared by all effects."""
+
+    game_time: float
+    # `pulse` results keyed on `(frequency, phase)`
+    pulses: dict[tuple[float, float], float] = field(default_factory=dict)
+
+
+@dataclass
+class EffectRegion:
+    """Cells an effect list applies to, `x` and `y` being the top-left corner."""
+
+    x: int
+    y: int
+    width: int
+    height: int
+
+
+@dataclass
+class EffectCells:
+    """Cells of a region handed to effects, the colour planes are rewritten in place."""
+
+    rows: np.ndarray  # shape (n,), dtype=int32, row offset inside the region
+    cols: np.ndarray  # shape (n,), dtype=int32, column offset inside the region
+    fg: np.ndarray  # shape (n, 4), dtype=float32, RGBA
+    bg: np.ndarray  # shape (n, 4), dtype=float32, RGBA
+    uniforms: FrameUniforms
+
+
+Effect = Callable[[EffectCells], None]
+
+
+def pulse(uniforms: FrameUniforms, frequency: float, phase: float = 0.0) -> float:
+    """Returns `0.5 + 0.5 * sin(frequency * game_time + phase)`, computed once per frame."""
+    key: tuple[float, float] = (frequency, phase)
+    value: float | None = uniforms.pulses.get(key)
+    if value is None:
+        value = 0.5 + 0.5 * math.sin(frequency * uniforms.game_time + phase)
+        uniforms.pulses[key] = value
+    return value
+
+
+def apply_effects(
+    batch: DrawBatch,
+    region: EffectRegion,
+    effects: list[Effect],
+    uniforms: FrameUniforms,
+) -> DrawBatch:
+    """Returns a copy of `batch` with `effects` applied in order to its cells inside `region`."""
+    rows = batch.ys - np.int32(region.y)
+    cols = batch.xs - np.int32(region.x)
+    fg = batch.fg.copy()
+    bg = batch.bg.copy()
+
+    inside = (rows >= 0) & (rows < region.height) & (cols >= 0) & (cols < region.width)
+    if inside.all():
+        cells = EffectCells(rows, cols, fg, bg, uniforms)
+        for effect in effects:
+            effect(cells)
+    else:
+        cells = EffectCells(rows[inside], cols[inside], fg[inside], bg[inside], uniforms)
+        for effect in effects:
+            effect(cells)
+        fg[inside] = cells.fg
+        bg[inside] = cells.bg
+
+    return DrawBatch(batch.ys, batch.xs, batch.chars, fg, bg, batch.attrs)
+
+
+# --- Effects ---
+
+
+def scale_effect(fg_scale: float, bg_scale: float) -> Effect:
+    """Multiplies the fg and bg RGB, clamped to 1.0."""
+    fg_factor = np.float32(fg_scale)
+    bg_factor = np.float32(bg_scale)
+
+    def effect(cells: EffectCells) -> None:
+        np.minimum(cells.fg[:, :3] * fg_factor, 1.0, out=cells.fg[:, :3])
+        np.minimum(cells.bg[:, :3] * bg_factor, 1.0, out=cells.bg[:, :3])
+
+    return effect
+
+
+def tint_effect(color: RGBA, fg_t: float, bg_t: float) -> Effect:
+    """Lerps the fg and bg RGB towards `color` like `lerp_rgb`."""
+    rgb = _rgb_array(color)
+    fg_weight = np.float32(_clamp01(fg_t))
+    bg_weight = np.float32(_clamp01(bg_t))
+
+    def effect(cells: EffectCells) -> None:
+        cells.fg[:, :3] += (rgb - cells.fg[:, :3]) * fg_weight
+        cells.bg[:, :3] += (rgb - cells.bg[:, :3]) * bg_weight
+
+    return effect
+
+
+def pulse_tint_effect(
+    color: RGBA,
+    frequency: float,
+    fg_amount: float,
+    bg_amount: float,
+    phase: float = 0.0,
+    rows: tuple[int, ...] | None = None,
+) -> Effect:
+    """Tints towards `color` by a sinewave `pulse` scaled by the amounts, limited to `rows`."""
+    rgb = _rgb_array(color)
+
+    def effect(cells: EffectCells) -> None:
+        t: float = pulse(cells.uniforms, frequency, phase)
+        fg_weight = np.float32(_clamp01(t * fg_amount))
+        bg_weight = np.float32(_clamp01(t * bg_amount))
+
+        if rows is None:
+            cells.fg[:, :3] += (rgb - cells.fg[:, :3]) * fg_weight
+            cells.bg[:, :3] += (rgb - cells.bg[:, :3]) * bg_weight
+            return
+
+        in_rows = np.isin(cells.rows, rows)
+        cells.fg[in_rows, :3] += (rgb - cells.fg[in_rows, :3]) * fg_weight
+        cells.bg[in_rows, :3] += (rgb - cells.bg[in_rows, :3]) * bg_weight
+
+    return effect
+
+
+def flicker_effect(bg_scales: np.ndarray, text_mixes: np.ndarray) -> Effect:
+    """Per row `i`, scales the bg by `bg_scales[i]` and lerps the text from it by `text_mixes[i]`.
+
+    The bg alpha is scaled as well, like multiplying an `RGBA` by a scalar.
+    """
+
+    def effect(cells: EffectCells) -> None:
+        cells.bg *= bg_scales[cells.rows, np.newaxis]
+        mix = text_mixes[cells.rows, np.newaxis]
+        cells.fg[:, :3] = cells.bg[:, :3] + (cells.fg[:, :3] - cells.bg[:, :3]) * mix
+
+    return effect
+
+
+def row_darken_effect(values: np.ndarray) -> Effect:
+    """Darkens row `i` by `values[i]` the same way as `mul_darken`.
+
+    Darkened colors become opaque like `lerp_rgb(RGBA.BLACK, color, value)`,
+    cells without a bg keep it transparent and values of 1.0 or more are no-ops.
+    """
+    clamped = np.maximum(values, 0.0).astype(np.float32)
+    darkened_rows = values < 1.0
+
+    def effect(cells: EffectCells) -> None:
+        darkened = darkened_rows[cells.rows]
+        scale = clamped[cells.rows[darkened], np.newaxis]
+
+        cells.fg[darkened, :3] *= scale
+        cells.fg[darkened, 3] = 1.0
+        cells.bg[darkened, :3] *= scale
+        cells.bg[darkened, 3] = np.where(cells.bg[darkened, 3] > 0.0, 1.0, 0.0)
+
+    return effect
+
+
+def _rgb_array(color: RGBA) -> np.ndarray:
+    return np.array((color.r, color.g, color.b), dtype=np.float32)
+
+
+def _clamp01(value: float) -> float:
+    return min(max(value, 0.0), 1.0)
@@ -1,34 +1,32 @@
-import math
-
-from term_slots.playing_card import PlayingCard, render_card_big
-from term_slots.renderer import RGBA, DrawCall, RichText, lerp_rgb
+from term_slots.config import Config
+from term_slots.effects import Effect, EffectRegion, FrameUniforms, apply_effects, pulse_tint_effect
+from term_slots.game_state import GameState
+from term_slots.playing_card import (
+    PLAYING_CARD_HEIGHT,
+    PLAYING_CARD_WIDTH,
+    PlayingCard,
+    card_sprite_big,
+)
+from term_slots.renderer import RGBA, DrawBatch
+
+# Green sinewave highlight
+GREEN_PULSE_EFFECT: Effect = pulse_tint_effect(
+    RGBA.GREEN, 5.0, fg_amount=0.4, bg_amount=0.7, phase=0.3
+)
+
+
+def calc_forced_burn_frame_rate(game_state: GameState, config: Config) -> float:
+    """Returns the frame rate the replacement card highlight needs, `0.0` when it's hidden."""
+    if game_state == GameState.FORCED_BURN_MODE:
+        return config.highlight_fps
+    return 0.0
 
 
 def render_forced_burn_replacement_card(
     x: int,
     y: int,
     card: PlayingCard,
-    game_time: float,
-) -> list[DrawCall]:
-    draw_calls: list[DrawCall] = []
-
-    card_draw_calls: list[DrawCall] = render_card_big(x, y, card)
-
-    for draw_call in card_draw_calls:
-        rt: RichText = draw_call.rich_text
-
-        # Green sinewave highlight
-        if rt.bg_color:
-            amplitude: float = 1.0
-            frequency: float = 5.0
-            phase_offset: float = 0.3
-
-            t: float = 0.5 + 0.5 * amplitude * math.sin(frequency * game_time + phase_offset)
-
-            rt.bg_color = lerp_rgb(rt.bg_color, RGBA.GREEN, t * 0.7)
-            rt.text_color = lerp_rgb(rt.text_color, RGBA.GREEN, t * 0.4)
-
-        draw_call.rich_text = rt
-
-    draw_calls.extend(card_draw_calls)
-    return draw_calls
+    uniforms: FrameUniforms,
+) -> list[DrawBatch]:
+    region = EffectRegion(x, y, PLAYING_CARD_WIDTH, PLAYING_CARD_HEIGHT)
+    return [apply_effects(card_sprite_big(x, y, card), region, [GREEN_PULSE_EFFECT], uniforms)]
@@ -1,11 +1,48 @@
-import math
 from dataclasses import dataclass
 
 from term_slots.config import Config
-from term_slots.playing_card import PLAYING_CARD_WIDTH, PlayingCard, render_card_big
-from term_slots.renderer import RGBA, DrawCall, RichText, lerp_rgb, mul_darken
+from term_slots.effects import (
+    Effect,
+    EffectRegion,
+    FrameUniforms,
+    apply_effects,
+    pulse,
+    pulse_tint_effect,
+    scale_effect,
+    tint_effect,
+)
+from term_slots.playing_card import (
+    PLAYING_CARD_HEIGHT,
+    PLAYING_CARD_WIDTH,
+    PlayingCard,
+    card_sprite_big,
+)
+from term_slots.renderer import (
+    RGBA,
+    DrawBatch,
+    DrawCall,
+    RichText,
+    compile_draw_calls,
+    lerp_rgb,
+)
 
 BURN_HIGHLIGHT_COLOR: RGBA = lerp_rgb(RGBA.ORANGE, RGBA.RED, 0.7)
+BURN_PULSE_FREQUENCY: float = 5.0
+# Opacity of the hand layer while the hand is not focused
+UNFOCUSED_HAND_OPACITY: float = 0.5
+
+# --- Card effects ---
+
+# Base card alpha
+HAND_CARD_BASE_EFFECT: Effect = scale_effect(0.8, 0.6)
+# Selected card alpha boost
+SELECTED_CARD_EFFECT: Effect = scale_effect(1.5, 1.5)
+# Cursor on hand burn mode highlight
+BURN_PULSE_EFFECT: Effect = pulse_tint_effect(
+    BURN_HIGHLIGHT_COLOR, BURN_PULSE_FREQUENCY, fg_amount=0.3, bg_amount=0.7
+)
+# Cursor on hand bg highlight
+CURSOR_HIGHLIGHT_EFFECT: Effect = tint_effect(lerp_rgb(RGBA.WHITE, RGBA.GOLD, 0.5), 0.0, 1.0)
 
 
 @dataclass
@@ -30,28 +67,41 @@ def get_not_selected_cards_in_hand(cards_in_hand: list[CardInHand]) -> list[Card
     return [card_in_hand for card_in_hand in cards_in_hand if not card_in_hand.is_selected]
 
 
+def render_hand_card_counter(x: int, y: int, hand: Hand, config: Config) -> list[DrawCall]:
+    """Renders the `cards/hand size` counter next to a hand rendered at `x`, `y`."""
+    card_x_spacing: int = PLAYING_CARD_WIDTH + config.hand_card_x_spacing
+    card_count: int = len(hand.cards_in_hand)
+
+    return [
+        DrawCall(
+            x + hand.hand_size * card_x_spacing,
+            y + 4,
+            RichText(f"{card_count}/{hand.hand_size}".rjust(5)),
+        )
+    ]
+
+
+def calc_hand_frame_rate(hand: Hand, config: Config, burn_mode_active: bool) -> float:
+    """Returns the frame rate the hand needs to animate, `0.0` when it's static."""
+    if burn_mode_active and hand.cards_in_hand:
+        # Burn highlight sinewave on the card under the cursor
+        return config.highlight_fps
+    return 0.0
+
+
 def render_hand(
     x: int,
     y: int,
     hand: Hand,
     config: Config,
-    game_time: float,
+    uniforms: FrameUniforms,
     hand_is_focused: bool,
     burn_mode_active: bool,
-) -> list[DrawCall]:
+) -> list[DrawBatch]:
+    batches: list[DrawBatch] = []
     draw_calls: list[DrawCall] = []
     card_x_spacing: int = PLAYING_CARD_WIDTH + config.hand_card_x_spacing
 
-    # Card counter
-    card_count: int = len(hand.cards_in_hand)
-    draw_calls.append(
-        DrawCall(
-            x + hand.hand_size * card_x_spacing,
-            y + 4,
-            RichText(f"{card_count}/{hand.hand_size}".rjust(5)),
-        )
-    )
-
     for card_index, card_in_hand in enumerate(hand.cards_in_hand):
         card: PlayingCard = card_in_hand.card
         cursor_on_card: bool = hand.cursor_pos == card_index
@@ -59,16 +109,16 @@ def render_hand(
         card_x: int = x + card_index * card_x_spacing
         card_y: int = y
 
-        amplitude: float = 1.0
-        frequency: float = 5.0
-        burn_sinewave: float = 0.5 + 0.5 * amplitude * math.sin(frequency * game_time)
-
         # Cursor arrow indicator
         if cursor_on_card and hand_is_focused:
             arrow_x: int = card_x + 1
             arrow_y: int = card_y + 3
             text_color: RGBA = (
-                lerp_rgb(RGBA.WHITE * 0.7, BURN_HIGHLIGHT_COLOR, burn_sinewave)
+                lerp_rgb(
+                    RGBA.WHITE * 0.7,
+                    BURN_HIGHLIGHT_COLOR,
+                    pulse(uniforms, BURN_PULSE_FREQUENCY),
+                )
                 if burn_mode_active
                 else lerp_rgb(RGBA.BLACK, lerp_rgb(RGBA.GOLD, RGBA.WHITE, 0.5), 0.8)
             )
@@ -78,37 +128,23 @@ def render_hand(
         if card_in_hand.is_selected and not burn_mode_active:
             card_y -= 1
 
-        card_draw_calls: list[DrawCall] = render_card_big(card_x, card_y, card)
-
-        for draw_call_index, draw_call in enumerate(card_draw_calls):
-            rt: RichText = draw_call.rich_text
-
-            # Base card alpha
-            if rt.bg_color:
-                rt.bg_color = lerp_rgb(RGBA.BLACK, rt.bg_color, 0.6)
-            rt.text_color = lerp_rgb(RGBA.BLACK, rt.text_color, 0.8)
+        effects: list[Effect] = [HAND_CARD_BASE_EFFECT]
 
-            # Selected card alpha boost
-            if card_in_hand.is_selected and not burn_mode_active:
-                if rt.bg_color:
-                    rt.bg_color *= 1.5
-                rt.text_color *= 1.5
-
-            # Lower alpha when hand is not focused
-            if not hand_is_focused:
-                rt = mul_darken(draw_call.rich_text, 0.5)
+        if card_in_hand.is_selected and not burn_mode_active:
+            effects.append(SELECTED_CARD_EFFECT)
 
-            # Cursor on hand burn mode highlight
-            if cursor_on_card and burn_mode_active and rt.bg_color:
-                rt.bg_color = lerp_rgb(rt.bg_color, BURN_HIGHLIGHT_COLOR, burn_sinewave * 0.7)
-                rt.text_color = lerp_rgb(rt.text_color, BURN_HIGHLIGHT_COLOR, burn_sinewave * 0.3)
+        if cursor_on_card and burn_mode_active:
+            effects.append(BURN_PULSE_EFFECT)
 
-            # Cursor on hand bg highlight
-            if cursor_on_card and hand_is_focused and not burn_mode_active and rt.bg_color:
-                rt.bg_color = lerp_rgb(RGBA.WHITE, RGBA.GOLD, 0.5)
+        if cursor_on_card and hand_is_focused and not burn_mode_active:
+            effects.append(CURSOR_HIGHLIGHT_EFFECT)
 
-            card_draw_calls[draw_call_index].rich_text = rt
+        region = EffectRegion(card_x, card_y, PLAYING_CARD_WIDTH, PLAYING_CARD_HEIGHT)
+        batches.append(
+            apply_effects(card_sprite_big(card_x, card_y, card), region, effects, uniforms)
+        )
 
-        draw_calls.extend(card_draw_calls)
+    # Cursor arrows sit below the cards, so they can be drawn last
+    batches.append(compile_draw_calls(draw_calls))
 
-    return draw_calls
+    return batches
@@ -0,0 +1,217 @@
+"""Headless terminal backend for measuring the renderer without a TTY.
+
+Output is captured in memory instead of being written to a terminal and can
+optionally be replayed through a minimal VT emulator to reconstruct the screen.
+"""
+
+import io
+import re
+from dataclasses import dataclass, field
+
+import numpy as np
+from blessed import Terminal
+
+from term_slots.config import Config
+from term_slots.context import Context
+from term_slots.main import tick
+from term_slots.renderer import (
+    ATTR_BOLD,
+    RGBA,
+    STYLE_CACHE,
+    XTERM_PALETTE,
+    ColorMode,
+    pack_rgb,
+    set_color_mode,
+)
+
+# CSI sequences, other escape sequences and runs of printable text
+_VT_TOKEN = re.compile(r"\x1b\[([0-9;?]*)([@-~])|\x1b[()#][0-9A-Za-z]|\x1b.|[^\x1b]+")
+
+_DEFAULT_FG: int = pack_rgb(RGBA.WHITE)
+_DEFAULT_BG: int = pack_rgb(RGBA.BLACK)
+
+
+class HeadlessTerminal(Terminal):
+    """blessed `Terminal` with a fixed size that writes into an in-memory stream."""
+
+    def __init__(self, width: int, height: int, kind: str = "xterm-256color"):
+        super().__init__(kind=kind, stream=io.StringIO(), force_styling=True)
+        self.number_of_colors = 1 << 24
+        self._headless_width = width
+        self._headless_height = height
+
+    @property
+    def width(self) -> int:
+        return self._headless_width
+
+    @property
+    def height(self) -> int:
+        return self._headless_height
+
+
+@dataclass
+class VTEmulator:
+    """Minimal VT emulator, understands what the renderer emits (CUP and SGR)."""
+
+    width: int
+    height: int
+    chars: np.ndarray = field(init=False)  # shape (height, width), dtype=uint32
+    fg: np.ndarray = field(init=False)  # shape (height, width), dtype=uint32, packed
+    bg: np.ndarray = field(init=False)  # shape (height, width), dtype=uint32, packed
+    attrs: np.ndarray = field(init=False)  # shape (height, width), dtype=uint8
+    cursor_x: int = 0
+    cursor_y: int = 0
+    sgr_fg: int = _DEFAULT_FG
+    sgr_bg: int = _DEFAULT_BG
+    sgr_attrs: int = 0
+
+    def __post_init__(self):
+        self.chars = np.full((self.height, self.width), ord(" "), dtype=np.uint32)
+        self.fg = np.full((self.height, self.width), _DEFAULT_FG, dtype=np.uint32)
+        self.bg = np.full((self.height, self.width), _DEFAULT_BG, dtype=np.uint32)
+        self.attrs = np.zeros((self.height, self.width), dtype=np.uint8)
+
+
+@dataclass
+class FrameStats:
+    bytes_written: int
+    cells_written: int
+
+
+@dataclass
+class HeadlessBackend:
+    term: HeadlessTerminal
+    emulator: VTEmulator | None
+    frames: list[FrameStats] = field(default_factory=list)
+
+
+def create_headless_backend(
+    width: int,
+    height: int,
+    color_mode: ColorMode = ColorMode.TRUECOLOR,
+    emulate: bool = True,
+) -> HeadlessBackend:
+    """Creates a backend whose terminal can be passed to `tick` and `flush_diffs`.
+
+    Sets the color mode of the shared `STYLE_CACHE`.
+    """
+    term = HeadlessTerminal(width, height)
+    set_color_mode(STYLE_CACHE, color_mode)
+    emulator: VTEmulator | None = VTEmulator(width, height) if emulate else None
+    return HeadlessBackend(term, emulator)
+
+
+def capture_frame(backend: HeadlessBackend) -> FrameStats:
+    """Collects everything written since the last capture as one frame."""
+    stream: io.StringIO = backend.term.stream
+    output: str = stream.getvalue()
+    stream.seek(0)
+    stream.truncate(0)
+
+    if backend.emulator is not None:
+        cells_written: int = feed_vt(backend.emulator, output)
+    else:
+        cells_written = sum(len(m.group()) for m in _VT_TOKEN.finditer(output) if m[0][0] != "\x1b")
+
+    stats = FrameStats(len(output.encode("utf-8")), cells_written)
+    backend.frames.append(stats)
+    return stats
+
+
+def headless_tick(backend: HeadlessBackend, ctx: Context, config: Config, dt: float) -> FrameStats:
+    tick(dt, ctx, backend.term, config)
+    return capture_frame(backend)
+
+
+def average_frame_stats(frames: list[FrameStats]) -> tuple[float, float]:
+    """Returns the mean `(bytes, cells)` written per frame."""
+    if not frames:
+        return 0.0, 0.0
+    total_bytes: int = sum(f.bytes_written for f in frames)
+    total_cells: int = sum(f.cells_written for f in frames)
+    return total_bytes / len(frames), total_cells / len(frames)
+
+
+def feed_vt(emu: VTEmulator, data: str) -> int:
+    """Applies `data` to the emulated screen, returns the number of cells written."""
+    cells_written: int = 0
+
+    for token in _VT_TOKEN.finditer(data):
+        text: str = token.group()
+
+        # --- Control sequences ---
+        if text[0] == "\x1b":
+            final: str | None = token.group(2)
+            params: str = token.group(1) or ""
+            if final == "H":
+                row, _, col = params.partition(";")
+                emu.cursor_y = int(row or 1) - 1
+                emu.cursor_x = int(col or 1) - 1
+            elif final == "m":
+                _apply_sgr(emu, params)
+            continue
+
+        # --- Printable text ---
+        for char in text:
+            if 0 <= emu.cursor_y < emu.height and 0 <= emu.cursor_x < emu.width:
+                emu.chars[emu.cursor_y, emu.cursor_x] = ord(char)
+                emu.fg[emu.cursor_y, emu.cursor_x] = emu.sgr_fg
+                emu.bg[emu.cursor_y, emu.cursor_x] = emu.sgr_bg
+                emu.attrs[emu.cursor_y, emu.cursor_x] = emu.sgr_attrs
+                cells_written += 1
+            emu.cursor_x += 1
+
+    return cells_written
+
+
+def _apply_sgr(emu: VTEmulator, params: str) -> None:
+    codes: list[int] = [int(code) if code else 0 for code in params.split(";")]
+
+    i: int = 0
+    while i < len(codes):
+        code: int = codes[i]
+
+        if code == 0:
+            emu.sgr_fg = _DEFAULT_FG
+            emu.sgr_bg = _DEFAULT_BG
+            emu.sgr_attrs = 0
+        elif code == 1:
+            emu.sgr_attrs |= ATTR_BOLD
+        elif code == 22:
+            emu.sgr_attrs &= ~ATTR_BOLD
+        elif code in (38, 48):
+            color, consumed = _parse_extended_color(codes[i + 1 :])
+            if code == 38:
+                emu.sgr_fg = color
+            else:
+                emu.sgr_bg = color
+            i += consumed
+        elif code == 39:
+            emu.sgr_fg = _DEFAULT_FG
+        elif code == 49:
+            emu.sgr_bg = _DEFAULT_BG
+        elif 30 <= code <= 37:
+            emu.sgr_fg = _palette_color(code - 30)
+        elif 90 <= code <= 97:
+            emu.sgr_fg = _palette_color(code - 90 + 8)
+        elif 40 <= code <= 47:
+            emu.sgr_bg = _palette_color(code - 40)
+        elif 100 <= code <= 107:
+            emu.sgr_bg = _palette_color(code - 100 + 8)
+
+        i += 1
+
+
+def _parse_extended_color(codes: list[int]) -> tuple[int, int]:
+    """Parses the arguments of a 38/48 SGR code, returns `(packed color, codes consumed)`."""
+    if len(codes) >= 4 and codes[0] == 2:
+        r, g, b = codes[1:4]
+        return (r << 16) | (g << 8) | b, 4
+    if len(codes) >= 2 and codes[0] == 5:
+        return _palette_color(codes[1]), 2
+    return _DEFAULT_FG, len(codes)
+
+
+def _palette_color(index: int) -> int:
+    r, g, b = XTERM_PALETTE[index]
+    return (r << 16) | (g << 8) | b
@@ -12,7 +12,13 @@ from term_slots.playing_card import RANK_COIN_VALUE, PlayingCard, Rank
 from term_slots.poker_hand import POKER_HAND_COIN_VALUE, eval_poker_hand
 from term_slots.popup_text import TextPopup
 from term_slots.renderer import RichText
-from term_slots.slots import Column, calc_column_spin_duration_sec, calc_spin_cost
+from term_slots.slots import (
+    Column,
+    calc_column_spin_duration_sec,
+    calc_spin_cost,
+    skip_slots_spin,
+    start_column_spin,
+)
 
 
 class Input(Enum):
@@ -26,11 +32,13 @@ class Input(Enum):
     TOGGLE_BURN_MODE = auto()
     SORT_HAND_BY_RANK = auto()
     SORT_HAND_BY_SUIT = auto()
+    TOGGLE_PROFILER = auto()
 
 
 class Action(Enum):
     QUIT_GAME = auto()
     SPIN_SLOTS = auto()
+    SKIP_SPIN = auto()
     SLOTS_MOVE_SELECTION_LEFT = auto()
     SLOTS_MOVE_SELECTION_RIGHT = auto()
     SLOTS_PICK_CARD = auto()
@@ -47,6 +55,7 @@ class Action(Enum):
     PLAY_HAND = auto()
     SORT_HAND_BY_RANK = auto()
     SORT_HAND_BY_SUIT = auto()
+    TOGGLE_PROFILER_OVERLAY = auto()
 
 
 KEYMAP: dict[str, Input] = {
@@ -60,6 +69,7 @@ KEYMAP: dict[str, Input] = {
     "q": Input.QUIT,
     "x": Input.SORT_HAND_BY_RANK,
     "c": Input.SORT_HAND_BY_SUIT,
+    "p": Input.TOGGLE_PROFILER,
 }
 
 
@@ -85,6 +95,9 @@ def get_action(ctx: Context, input: Input) -> Action | None:
     if input == Input.QUIT:
         return Action.QUIT_GAME
 
+    if input == Input.TOGGLE_PROFILER:
+        return Action.TOGGLE_PROFILER_OVERLAY
+
     slots_focused_game_states: list[GameState] = [
         GameState.READY_TO_SPIN_SLOTS,
         GameState.SPINNING_SLOTS,
@@ -108,6 +121,10 @@ def get_action(ctx: Context, input: Input) -> Action | None:
         if input == Input.SWAP and any_cards_in_hand:
             return Action.FOCUS_HAND
 
+    if ctx.game_state == GameState.SPINNING_SLOTS:
+        if input == Input.CONFIRM:
+            return Action.SKIP_SPIN
+
     if ctx.game_state == GameState.SLOTS_POST_SPIN_COLUMN_PICKING:
         first_column_is_selected: bool = ctx.slots.selected_column_index == 0
         last_column_is_selected: bool = (
@@ -183,6 +200,9 @@ def resolve_action(ctx: Context, action: Action, config: config.Config) -> None:
         case Action.QUIT_GAME:
             exit()
 
+        case Action.TOGGLE_PROFILER_OVERLAY:
+            ctx.profiler.overlay_enabled = not ctx.profiler.overlay_enabled
+
         case Action.SPIN_SLOTS:
             spin_cost: int = calc_spin_cost(ctx.slots.spin_count)
             ctx.coins -= spin_cost
@@ -200,11 +220,16 @@ def resolve_action(ctx: Context, action: Action, config: config.Config) -> None:
 
             for col_index, selected_col in enumerate(ctx.slots.columns):
                 spin_duration: float = calc_column_spin_duration_sec(col_index, config)
-                selected_col.spin_duration = spin_duration
-                selected_col.spin_time_remaining = spin_duration
+                start_column_spin(
+                    selected_col, spin_duration, ctx.game_time, config.slots_max_spin_speed
+                )
 
             ctx.game_state = GameState.SPINNING_SLOTS
 
+        case Action.SKIP_SPIN:
+            # The spin finishes on the next tick
+            skip_slots_spin(ctx)
+
         case Action.SLOTS_MOVE_SELECTION_LEFT:
             ctx.slots.selected_column_index -= 1
 
@@ -300,6 +325,7 @@ def resolve_action(ctx: Context, action: Action, config: config.Config) -> None:
 
                 ctx.coins += coin_payout
                 ctx.score += coin_payout
+                ctx.last_played_hand = (poker_hand, coin_payout)
 
                 # Clamp cursor to not exceed the max card index
                 new_card_count = len(ctx.hand.cards_in_hand)
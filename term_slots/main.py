@@ -2,13 +2,37 @@ import random
 from typing import Never
 
 from blessed import Terminal
+from blessed.keyboard import Keystroke
 
 from term_slots.config import Config
 from term_slots.context import Context, elapsed_fraction
-from term_slots.forced_burn import render_forced_burn_replacement_card
+from term_slots.effects import FrameUniforms
+from term_slots.forced_burn import (
+    calc_forced_burn_frame_rate,
+    render_forced_burn_replacement_card,
+)
 from term_slots.game_state import GameState
-from term_slots.hand import Hand, get_selected_cards_in_hand, render_hand
+from term_slots.hand import (
+    UNFOCUSED_HAND_OPACITY,
+    Hand,
+    calc_hand_frame_rate,
+    get_selected_cards_in_hand,
+    render_hand,
+    render_hand_card_counter,
+)
 from term_slots.input import drain_input, get_action, map_input, resolve_action
+from term_slots.output import (
+    OutputMonitor,
+    frame_writer_accepts_frame,
+    frame_writer_queue_depth,
+    output_counters,
+    should_render_frame,
+    start_frame_writer,
+    stop_frame_writer,
+    submit_frame,
+    supports_synchronized_output,
+    write_monitored,
+)
 from term_slots.playing_card import (
     FULL_DECK,
     PlayingCard,
@@ -16,39 +40,151 @@ from term_slots.playing_card import (
     Suit,
 )
 from term_slots.poker_hand import POKER_HAND_NAMES, eval_poker_hand
-from term_slots.popup_text import render_all_text_popups
+from term_slots.popup_text import calc_text_popups_frame_rate, render_all_text_popups
+from term_slots.profiler import (
+    OVERLAY_HEIGHT,
+    FrameProfiler,
+    Phase,
+    begin_frame,
+    dump_profile,
+    end_frame,
+    profile_phase,
+    render_profiler_overlay,
+)
 from term_slots.renderer import (
+    FRAME_BUFFER,
     RGBA,
+    STYLE_CACHE,
     DrawCall,
     FPSCounter,
+    Layer,
     RichText,
     Screen,
+    ScreenCell,
     buffer_diff,
-    create_fps_limiter,
+    compile_draw_calls,
+    composite_layers,
+    detect_color_mode,
+    encode_diffs,
     fill_screen_background,
-    flush_diffs,
     lerp_rgb,
-    print_at,
+    resize_screen,
+    set_color_mode,
     update_fps_counter,
 )
+from term_slots.scheduler import create_frame_scheduler, set_frame_rate, wait_for_next_frame
 from term_slots.slots import (
     Column,
     Slots,
+    calc_slots_frame_rate,
     calc_spin_cost,
     render_slots,
     spin_slots_and_check_finished,
 )
+from term_slots.terminal_size import TerminalSize, poll_terminal_size, watch_terminal_size
+from term_slots.widget import Widget, render_widget
 
 BACKGROUND_COLOR: RGBA = RGBA.BLACK
+HAND_X: int = 13
+HAND_Y: int = 20
+
+
+def render_poker_hand_name(ctx: Context, config: Config) -> list[DrawCall]:
+    selected_cards: list[PlayingCard] = [
+        c.card for c in get_selected_cards_in_hand(ctx.hand.cards_in_hand)
+    ]
+    if not selected_cards:
+        return []
+
+    poker_hand, _ = eval_poker_hand(selected_cards)
+    return [DrawCall(5, 17, RichText(POKER_HAND_NAMES[poker_hand]))]
+
+
+def render_spin_cost(ctx: Context, config: Config) -> list[DrawCall]:
+    spin_cost: int = calc_spin_cost(ctx.slots.spin_count)
+    return [DrawCall(5, 12, RichText(f"Spin cost: {spin_cost}", RGBA.WHITE))]
+
+
+def render_score(ctx: Context, config: Config) -> list[DrawCall]:
+    return [DrawCall(5, 13, RichText(f"Score: {ctx.score}", RGBA.LIGHT_BLUE))]
+
+
+def render_coins(ctx: Context, config: Config) -> list[DrawCall]:
+    coins_text_color: RGBA = lerp_rgb(RGBA.GOLD, RGBA.ORANGE, 0.4)
+    return [DrawCall(5, 14, RichText(f"Coins: {ctx.coins}", coins_text_color))]
+
+
+def render_fps(ctx: Context, config: Config) -> list[DrawCall]:
+    fps_text = f"{ctx.fps_counter.ema:5.1f} FPS"
+    x = ctx.screen.width - len(fps_text) - 1
+    return [DrawCall(x, 1, RichText(fps_text, lerp_rgb(RGBA.GREEN, RGBA.WHITE, 0.6)))]
+
+
+def render_hand_card_count(ctx: Context, config: Config) -> list[DrawCall]:
+    return render_hand_card_counter(HAND_X, HAND_Y, ctx.hand, config)
+
+
+def render_debug_text(ctx: Context, config: Config) -> list[DrawCall]:
+    debug_text: RichText = (
+        RichText(ctx.debug_text, RGBA.WHITE * 0.5)
+        if isinstance(ctx.debug_text, str)
+        else ctx.debug_text
+    )
+    return [DrawCall(35, 0, debug_text)]
+
+
+def get_debug_text_inputs(ctx: Context, config: Config) -> object:
+    """Copies the fields of a `RichText` debug text, so edits made in place are noticed."""
+    if isinstance(ctx.debug_text, str):
+        return ctx.debug_text
+    t: RichText = ctx.debug_text
+    return (t.text, t.text_color, t.bg_color, t.bold)
+
+
+def render_game_state(ctx: Context, config: Config) -> list[DrawCall]:
+    game_state_text = str(ctx.game_state.name)
+    x = ctx.screen.width - len(game_state_text) - 1
+    return [DrawCall(x, 0, RichText(game_state_text, lerp_rgb(RGBA.RED, RGBA.WHITE, 0.6)))]
+
+
+# Static and slowly changing UI, only re-rendered when their inputs change
+POKER_HAND_NAME_WIDGET = Widget(
+    render_poker_hand_name,
+    lambda ctx, _: [(c.card.suit, c.card.rank) for c in ctx.hand.cards_in_hand if c.is_selected],
+)
+SPIN_COST_WIDGET = Widget(render_spin_cost, lambda ctx, _: ctx.slots.spin_count)
+SCORE_WIDGET = Widget(render_score, lambda ctx, _: ctx.score)
+COINS_WIDGET = Widget(render_coins, lambda ctx, _: ctx.coins)
+FPS_WIDGET = Widget(
+    render_fps,
+    lambda ctx, _: (round(ctx.fps_counter.ema, 1), ctx.screen.width),
+)
+HAND_CARD_COUNT_WIDGET = Widget(
+    render_hand_card_count,
+    lambda ctx, config: (
+        len(ctx.hand.cards_in_hand),
+        ctx.hand.hand_size,
+        config.hand_card_x_spacing,
+    ),
+)
+DEBUG_TEXT_WIDGET = Widget(render_debug_text, get_debug_text_inputs)
+GAME_STATE_WIDGET = Widget(
+    render_game_state,
+    lambda ctx, _: (ctx.game_state, ctx.screen.width),
+)
 
 
 def tick(dt: float, ctx: Context, term: Terminal, config: Config) -> None:
-    if (term.width, term.height) != (ctx.screen.width, ctx.screen.height):
-        ctx.screen = Screen(term.width, term.height)
-        fill_screen_background(ctx.screen.new_buffer, RGBA.BLACK)
+    t: float = begin_frame(ctx.profiler)
+
+    if poll_terminal_size(term, ctx.terminal_size):
+        resize_screen(ctx.screen, ctx.terminal_size.width, ctx.terminal_size.height)
 
     # --- Inputs ---
-    for key_event in drain_input(term):
+    key_events: list[Keystroke] = list(drain_input(term))
+    t = profile_phase(ctx.profiler, Phase.INPUT, t)
+
+    for key_event in key_events:
         # Mouse hover memory
         if key_event.name == "MOUSE_MOTION":
             ctx.last_mouse_pos = key_event.mouse_xy
@@ -57,12 +193,13 @@ def tick(dt: float, ctx: Context, term: Terminal, config: Config) -> None:
         if input := map_input(key_event):
             if action := get_action(ctx, input):
                 resolve_action(ctx, action, config)
+    t = profile_phase(ctx.profiler, Phase.ACTIONS, t)
 
     # --- Game logic ---
     ctx.game_time += dt
 
     if ctx.game_state == GameState.SPINNING_SLOTS:
-        spin_finished: bool = spin_slots_and_check_finished(ctx, dt, config.slots_max_spin_speed)
+        spin_finished: bool = spin_slots_and_check_finished(ctx, config.slots_max_spin_speed)
 
         if spin_finished:
             ctx.game_state = GameState.SLOTS_POST_SPIN_COLUMN_PICKING
@@ -75,50 +212,34 @@ def tick(dt: float, ctx: Context, term: Terminal, config: Config) -> None:
     ]
 
     update_fps_counter(ctx.fps_counter, dt / config.game_speed)
+    t = profile_phase(ctx.profiler, Phase.GAME_LOGIC, t)
+
+    # Skip rendering while the terminal is still busy with earlier frames
+    ctx.render_skipped = not should_render_frame(ctx.output_monitor, term.stream) or (
+        ctx.frame_writer is not None and not frame_writer_accepts_frame(ctx.frame_writer)
+    )
+    if ctx.render_skipped:
+        return
 
     # --- Rendering ---
-    draw_calls: list[DrawCall] = []
+    layers: list[Layer] = []
+    # Shared by every effect drawn this frame
+    uniforms = FrameUniforms(ctx.game_time)
 
     # Slots rendering
-    draw_calls.extend(render_slots(13, 6, ctx, ctx.game_time))
-
-    # Current hand display rendering
-    selected_cards: list[PlayingCard] = [
-        c.card for c in get_selected_cards_in_hand(ctx.hand.cards_in_hand)
-    ]
-    if selected_cards:
-        poker_hand, _ = eval_poker_hand(selected_cards)
-
-        draw_calls.append(
-            DrawCall(
-                5,
-                17,
-                RichText(POKER_HAND_NAMES[poker_hand]),
-            )
-        )
-
-    # Spin cost display rendering
-    spin_cost: int = calc_spin_cost(ctx.slots.spin_count)
-    draw_calls.append(DrawCall(5, 12, RichText(f"Spin cost: {spin_cost}", RGBA.WHITE)))
-
-    # Score display rendering
-    draw_calls.append(DrawCall(5, 13, RichText(f"Score: {ctx.score}", RGBA.LIGHT_BLUE)))
-
-    # Coins display rendering
-    coins_text_color: RGBA = lerp_rgb(RGBA.GOLD, RGBA.ORANGE, 0.4)
-    draw_calls.append(DrawCall(5, 14, RichText(f"Coins: {ctx.coins}", coins_text_color)))
-
-    # FPS display rendering
-    fps_text = f"{ctx.fps_counter.ema:5.1f} FPS"
-    x = ctx.screen.width - len(fps_text) - 1
-    draw_calls.append(
-        DrawCall(
-            x,
-            1,
-            RichText(
-                fps_text,
-                lerp_rgb(RGBA.GREEN, RGBA.WHITE, 0.6),
-            ),
+    layers.append(Layer(render_slots(13, 6, ctx, uniforms)))
+
+    # HUD rendering: current hand, spin cost, score, coins, FPS and card count displays
+    layers.append(
+        Layer(
+            [
+                render_widget(POKER_HAND_NAME_WIDGET, ctx, config),
+                render_widget(SPIN_COST_WIDGET, ctx, config),
+                render_widget(SCORE_WIDGET, ctx, config),
+                render_widget(COINS_WIDGET, ctx, config),
+                render_widget(FPS_WIDGET, ctx, config),
+                render_widget(HAND_CARD_COUNT_WIDGET, ctx, config),
+            ]
         )
     )
 
@@ -133,62 +254,114 @@ def tick(dt: float, ctx: Context, term: Terminal, config: Config) -> None:
         GameState.BURN_MODE,
         GameState.FORCED_BURN_MODE,
     )
-    draw_calls.extend(
+    hand_layer = Layer(
         render_hand(
-            13,
-            20,
+            HAND_X,
+            HAND_Y,
             ctx.hand,
             config,
-            ctx.game_time,
+            uniforms,
             hand_is_focused,
             burn_mode_active,
-        )
+        ),
+        opacity=1.0 if hand_is_focused else UNFOCUSED_HAND_OPACITY,
     )
 
     # Forced burn mode replacement card rendering
     if ctx.game_state == GameState.FORCED_BURN_MODE:
-        draw_calls.extend(
-            render_forced_burn_replacement_card(
-                5, 20, ctx.forced_burn_replacement_card, ctx.game_time
-            )
+        hand_layer.batches.extend(
+            render_forced_burn_replacement_card(5, 20, ctx.forced_burn_replacement_card, uniforms)
         )
-
-    # Misc debug line rendering
-    if isinstance(ctx.debug_text, str):
-        ctx.debug_text = RichText(ctx.debug_text, RGBA.WHITE * 0.5)
-    draw_calls.append(DrawCall(35, 0, ctx.debug_text))
+    layers.append(hand_layer)
 
     # Text popup rendering
-    draw_calls.extend(render_all_text_popups(ctx.all_text_popups, ctx.game_time))
-
-    # Debug game state display rendering
-    game_state_text = str(ctx.game_state.name)
-    x = ctx.screen.width - len(game_state_text) - 1
-    draw_calls.append(
-        DrawCall(
-            x,
-            0,
-            RichText(game_state_text, lerp_rgb(RGBA.RED, RGBA.WHITE, 0.6)),
+    layers.extend(render_all_text_popups(ctx.all_text_popups, ctx.game_time))
+
+    # Debug overlay rendering: misc debug line, game state and mouse position
+    layers.append(
+        Layer(
+            [
+                render_widget(DEBUG_TEXT_WIDGET, ctx, config),
+                render_widget(GAME_STATE_WIDGET, ctx, config),
+                # REALTIME MOUSE POSITION EXPERIMENT
+                compile_draw_calls(
+                    [
+                        DrawCall(
+                            ctx.last_mouse_pos[0],
+                            ctx.last_mouse_pos[1],
+                            RichText(" ", bg_color=RGBA.WHITE),
+                        )
+                    ]
+                ),
+            ]
         )
     )
 
-    # REALTIME MOUSE POSITION EXPERIMENT
-    draw_calls.append(
-        DrawCall(ctx.last_mouse_pos[0], ctx.last_mouse_pos[1], RichText(" ", bg_color=RGBA.WHITE))
+    # Frame timing profiler overlay
+    if ctx.profiler.overlay_enabled:
+        overlay_y: int = ctx.screen.height - OVERLAY_HEIGHT - 1
+        counters: dict[str, int] = output_counters(ctx.output_monitor, ctx.frame_writer)
+        layers.append(
+            Layer(
+                [compile_draw_calls(render_profiler_overlay(1, overlay_y, ctx.profiler, counters))]
+            )
+        )
+    t = profile_phase(ctx.profiler, Phase.DRAW_CALLS, t)
+
+    composite_layers(ctx.screen.new_buffer, layers)
+    t = profile_phase(ctx.profiler, Phase.RASTERIZE, t)
+
+    diffs: list[tuple[int, int, ScreenCell]] = buffer_diff(ctx.screen)
+    t = profile_phase(ctx.profiler, Phase.DIFF, t)
+
+    synchronized: bool = bool(config.synchronized_output)
+    if ctx.frame_writer is not None:
+        # The writer thread takes ownership of the frame, so `FRAME_BUFFER` can't be reused
+        frame: bytearray = encode_diffs(term, diffs, synchronized=synchronized)
+        t = profile_phase(ctx.profiler, Phase.ENCODE, t)
+        submit_frame(ctx.frame_writer, frame)
+    else:
+        frame = encode_diffs(term, diffs, out=FRAME_BUFFER, synchronized=synchronized)
+        t = profile_phase(ctx.profiler, Phase.ENCODE, t)
+        if frame:
+            write_monitored(ctx.output_monitor, term.stream, frame)
+
+    profile_phase(ctx.profiler, Phase.WRITE, t)
+    end_frame(ctx.profiler)
+
+
+def calc_frame_rate(ctx: Context, config: Config) -> float:
+    """Returns the frame rate the fastest animation on screen needs, `0.0` when nothing animates.
+
+    Stays at `config.max_fps` while a skipped frame or queued output hasn't
+    reached the terminal yet, so changes made meanwhile show up right away.
+    """
+    if ctx.render_skipped or (
+        ctx.frame_writer is not None and frame_writer_queue_depth(ctx.frame_writer) > 0
+    ):
+        return config.max_fps
+
+    burn_mode_active: bool = ctx.game_state in (
+        GameState.BURN_MODE,
+        GameState.FORCED_BURN_MODE,
+    )
+    return max(
+        calc_slots_frame_rate(ctx, config),
+        calc_hand_frame_rate(ctx.hand, config, burn_mode_active),
+        calc_forced_burn_frame_rate(ctx.game_state, config),
+        calc_text_popups_frame_rate(ctx.all_text_popups, config),
     )
 
-    for draw_call in draw_calls:
-        print_at(term, ctx.screen, draw_call.x, draw_call.y, draw_call.rich_text)
-    flush_diffs(term, buffer_diff(ctx.screen))
 
+def create_context(width: int, height: int, rng: random.Random | None = None) -> Context:
+    """Creates the context of a new game rendered on a `width` x `height` screen.
 
-def main() -> Never:
+    The column decks are shuffled with `rng`, the global `random` state by default.
+    """
     # aces_of_spades_deck = [PlayingCard(Suit.SPADE, Rank.ACE) for _ in range(52)]
-    term = Terminal()
-    config = Config()
     ctx = Context(
         last_mouse_pos=(0, 0),
-        screen=Screen(term.width, term.height),
+        screen=Screen(width, height),
         game_time=0.0,
         game_state=GameState.READY_TO_SPIN_SLOTS,
         coins=500,
@@ -209,12 +382,27 @@ def main() -> Never:
         all_text_popups=[],
         forced_burn_replacement_card=PlayingCard(Suit.SPADE, Rank.ACE),
         fps_counter=FPSCounter(),
+        output_monitor=OutputMonitor(),
+        terminal_size=TerminalSize(width, height),
+        profiler=FrameProfiler(),
     )
 
+    shuffle = random.shuffle if rng is None else rng.shuffle
     for column in ctx.slots.columns:
-        random.shuffle(column.cards)
+        shuffle(column.cards)
+
+    return ctx
+
+
+def main() -> Never:
+    term = Terminal()
+    config = Config()
+    ctx = create_context(term.width, term.height)
+
+    set_color_mode(STYLE_CACHE, config.color_mode or detect_color_mode(term))
+    watch_terminal_size(ctx.terminal_size)
 
-    fps_limiter = create_fps_limiter(144)
+    frame_scheduler = create_frame_scheduler(config.max_fps)
 
     with (
         term.cbreak(),
@@ -226,7 +414,31 @@ def main() -> Never:
 
         fill_screen_background(ctx.screen.new_buffer, RGBA.BLACK)
 
-        while True:
-            dt *= config.game_speed
-            tick(dt, ctx, term, config)
-            dt = fps_limiter()
+        if config.synchronized_output is None:
+            config.synchronized_output = supports_synchronized_output(term)
+
+        if config.pipelined_output:
+            ctx.frame_writer = start_frame_writer(term.stream, ctx.output_monitor)
+
+        try:
+            while True:
+                dt *= config.game_speed
+                tick(dt, ctx, term, config)
+
+                # Drop to the idle frame rate while nothing animates
+                set_frame_rate(
+                    frame_scheduler,
+                    calc_frame_rate(ctx, config),
+                    config.idle_frame_time_sec,
+                )
+                dt = wait_for_next_frame(frame_scheduler, term)
+        finally:
+            # Let the last frame reach the terminal before leaving fullscreen
+            if ctx.frame_writer is not None:
+                stop_frame_writer(ctx.frame_writer)
+            if config.profile_dump_path is not None:
+                dump_profile(
+                    ctx.profiler,
+                    config.profile_dump_path,
+                    output_counters(ctx.output_monitor, ctx.frame_writer),
+                )
@@ -0,0 +1,231 @@
+import os
+import select
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TextIO
+
+from blessed import Terminal
+
+# Synchronized update (DEC private mode 2026), a supporting terminal holds off
+# presenting the screen until the end marker arrives
+SYNC_UPDATE_BEGIN: bytes = b"\x1b[?2026h"
+SYNC_UPDATE_END: bytes = b"\x1b[?2026l"
+
+
+@dataclass
+class OutputMonitor:
+    """Tracks how fast the terminal drains the frames written to it."""
+
+    # Writes blocking for longer than this mean the terminal is falling behind
+    latency_budget: float = 0.004
+    write_latency_ema: float = 0.0
+    throughput_ema: float = 0.0  # bytes per second
+    alpha: float = 0.2
+    # `time.perf_counter()` timestamp until which the terminal is estimated to be busy
+    busy_until: float = 0.0
+    frames_written: int = 0
+    frames_dropped: int = 0
+
+
+@dataclass
+class FrameWriter:
+    """Writes encoded frames on a background thread.
+
+    Frames are handed over through a single slot. While the slot is occupied
+    the main loop skips rendering, so the frame waiting in it always ends up
+    holding the latest screen state once the writer gets to it.
+
+    A failed write stops the thread, the error is raised again on the main
+    thread by the next `frame_writer_accepts_frame` or `submit_frame` call.
+    """
+
+    stream: TextIO
+    monitor: OutputMonitor
+    pending: bytes | bytearray | None = None
+    in_flight: bool = False
+    running: bool = True
+    frames_dropped: int = 0
+    error: OSError | None = None
+    condition: threading.Condition = field(default_factory=threading.Condition)
+    thread: threading.Thread | None = None
+
+
+def start_frame_writer(stream: TextIO, monitor: OutputMonitor) -> FrameWriter:
+    writer = FrameWriter(stream, monitor)
+    writer.thread = threading.Thread(
+        target=_run_frame_writer, args=(writer,), name="frame-writer", daemon=True
+    )
+    writer.thread.start()
+    return writer
+
+
+def stop_frame_writer(writer: FrameWriter) -> None:
+    """Writes out the pending frame and stops the writer thread."""
+    with writer.condition:
+        writer.running = False
+        writer.condition.notify_all()
+    if writer.thread is not None:
+        writer.thread.join()
+
+
+def frame_writer_accepts_frame(writer: FrameWriter) -> bool:
+    """Returns `False` (and counts a dropped frame) while the slot is still occupied."""
+    _raise_writer_error(writer)
+    if writer.pending is not None:
+        writer.frames_dropped += 1
+        return False
+    return True
+
+
+def submit_frame(writer: FrameWriter, data: bytes | bytearray) -> None:
+    """Hands `data` over to the writer thread, which takes ownership of it."""
+    _raise_writer_error(writer)
+    if not data:
+        return
+    with writer.condition:
+        # Only the main thread fills the slot, after `frame_writer_accepts_frame`
+        # found it empty. Frames are diffs against the previous one, so one
+        # waiting in the slot must never be replaced
+        assert writer.pending is None, "submit_frame called while the slot is occupied"
+        writer.pending = data
+        writer.condition.notify_all()
+
+
+def frame_writer_queue_depth(writer: FrameWriter) -> int:
+    """Number of frames that are waiting in the slot or being written."""
+    return int(writer.pending is not None) + int(writer.in_flight)
+
+
+def output_counters(monitor: OutputMonitor, writer: FrameWriter | None) -> dict[str, int]:
+    """Returns how many frames were written, dropped and are queued, for the profiler."""
+    return {
+        "written": monitor.frames_written,
+        # Dropped because the terminal fell behind, see `should_render_frame`
+        "dropped": monitor.frames_dropped,
+        # Dropped because the writer slot was still occupied
+        "writer_dropped": writer.frames_dropped if writer is not None else 0,
+        "queue_depth": frame_writer_queue_depth(writer) if writer is not None else 0,
+    }
+
+
+def should_render_frame(monitor: OutputMonitor, stream: TextIO) -> bool:
+    """Returns `False` (and counts a dropped frame) while the terminal can't keep up.
+
+    Dropped frames are never diffed, so the next rendered frame is diffed
+    against the last written one and carries all changes made in between.
+    """
+    if time.perf_counter() < monitor.busy_until or not _is_writable(stream):
+        monitor.frames_dropped += 1
+        return False
+    return True
+
+
+def write_monitored(monitor: OutputMonitor, stream: TextIO, data: bytes | bytearray) -> None:
+    started: float = time.perf_counter()
+    write_frame(stream, data)
+    finished: float = time.perf_counter()
+
+    record_write(monitor, len(data), finished - started, finished)
+
+
+def write_frame(stream: TextIO, data: bytes | bytearray) -> None:
+    """Writes the encoded frame `data` straight to the file descriptor behind `stream`.
+
+    Text still buffered in `stream` is flushed first so writes stay in order.
+    Streams without a file descriptor are given the decoded text instead.
+    """
+    fd: int | None = _stream_fd(stream)
+    if fd is None:
+        stream.write(data.decode())
+        stream.flush()
+        return
+
+    stream.flush()
+    view = memoryview(data)
+    while view:
+        try:
+            written: int = os.write(fd, view)
+        except BlockingIOError:
+            select.select([], [fd], [])
+            continue
+        view = view[written:]
+
+
+def supports_synchronized_output(term: Terminal) -> bool:
+    """Asks the terminal whether it supports synchronized updates, must be in cbreak mode."""
+    return term.get_dec_mode(Terminal.DecPrivateMode.SYNCHRONIZED_OUTPUT).is_supported()
+
+
+def record_write(monitor: OutputMonitor, size: int, duration: float, finished: float) -> None:
+    monitor.frames_written += 1
+    monitor.write_latency_ema = _ema(monitor.write_latency_ema, duration, monitor.alpha)
+    if duration > 0.0:
+        monitor.throughput_ema = _ema(monitor.throughput_ema, size / duration, monitor.alpha)
+
+    # A write that blocked means the output queue was full, assume draining
+    # the rest of it takes about as long as we were blocked for
+    overrun: float = duration - monitor.latency_budget
+    if overrun > 0.0:
+        monitor.busy_until = finished + overrun
+
+
+def _run_frame_writer(writer: FrameWriter) -> None:
+    while True:
+        with writer.condition:
+            while writer.pending is None and writer.running:
+                writer.condition.wait()
+            if writer.pending is None:
+                # Stopped and nothing left to write
+                return
+            data: bytes | bytearray = writer.pending
+            writer.pending = None
+            writer.in_flight = True
+
+        try:
+            write_monitored(writer.monitor, writer.stream, data)
+        except OSError as error:
+            # Raised again on the main thread, the way a synchronous write would fail
+            with writer.condition:
+                writer.error = error
+                writer.pending = None
+                writer.in_flight = False
+                writer.running = False
+                writer.condition.notify_all()
+            return
+
+        with writer.condition:
+            writer.in_flight = False
+            writer.condition.notify_all()
+
+
+def _raise_writer_error(writer: FrameWriter) -> None:
+    if writer.error is not None:
+        raise writer.error
+
+
+def _ema(current: float, sample: float, alpha: float) -> float:
+    if current <= 0.0:
+        return sample
+    return current * (1.0 - alpha) + sample * alpha
+
+
+def _stream_fd(stream: TextIO) -> int | None:
+    try:
+        return stream.fileno()
+    except AttributeError, OSError, ValueError:
+        return None
+
+
+def _is_writable(stream: TextIO) -> bool:
+    """Checks without blocking whether `stream` can accept more output.
+
+    Streams without a selectable file descriptor (in-memory streams, Windows
+    consoles) are always considered writable.
+    """
+    try:
+        fd: int = stream.fileno()
+        _, writable, _ = select.select([], [fd], [], 0.0)
+    except AttributeError, OSError, ValueError:
+        return True
+    return bool(writable)
@@ -0,0 +1,227 @@
+"""Exact odds and expected payouts of played hands, computed by counting instead of sampling.
+
+Columns never run out of cards, so every card picked out of the slots is an
+independent draw from the cards of a column. With the column picked at
+random, a hand of `k` cards is `k` draws from the pooled card weights of all
+columns. The probability of a poker hand only depends on the multiset of its
+ranks and on whether its cards share a suit, so instead of enumerating every
+hand each rank multiset is counted once and evaluated through a
+representative hand with `eval_poker_hand`.
+
+Tables are cached on disk keyed by a hash of the card weights and payouts.
+Run with `python -m term_slots.payout`.
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import os
+from collections import Counter
+from dataclasses import dataclass
+from fractions import Fraction
+
+from term_slots.main import create_context
+from term_slots.playing_card import RANK_COIN_VALUE, PlayingCard, Rank, Suit
+from term_slots.poker_hand import POKER_HAND_COIN_VALUE, PokerHand, eval_poker_hand
+from term_slots.slots import Column, calc_spin_cost
+
+# Mirrors the selection limit of `resolve_action`, a played hand has at most 5 cards
+MAX_PLAYED_HAND_SIZE: int = 5
+# A flush needs this many cards of one suit, see `poker_hand._is_flush`
+FLUSH_SIZE: int = 5
+DEFAULT_CACHE_DIR: str = os.path.join(os.path.expanduser("~"), ".cache", "term_slots", "payout")
+# Bump whenever the computation changes so stale cache files are ignored
+_CACHE_VERSION: int = 1
+
+
+@dataclass
+class PayoutTable:
+    """Exact odds of hands of `hand_size` cards, poker hands that can't happen are left out."""
+
+    hand_size: int
+    probabilities: dict[PokerHand, Fraction]
+    # Coins a played hand pays on average, poker hand value plus scoring card ranks
+    expected_payout: Fraction
+    expected_payout_per_card: Fraction
+
+
+# Relative odds of drawing each card, `(suit, rank)` to integer weight
+CardWeights = dict[tuple[Suit, Rank], int]
+
+
+def column_card_weights(columns: list[Column]) -> CardWeights:
+    """Returns the weights of a card drawn from a column picked at random out of `columns`."""
+    # Scales every column to the same total weight, keeping the weights integers
+    common_length: int = math.lcm(*(len(column.cards) for column in columns if column.cards))
+
+    weights: CardWeights = {}
+    for column in columns:
+        if not column.cards:
+            continue
+        card_weight: int = common_length // len(column.cards)
+        for card in column.cards:
+            key: tuple[Suit, Rank] = (card.suit, card.rank)
+            weights[key] = weights.get(key, 0) + card_weight
+    return weights
+
+
+def compute_payout_table(weights: CardWeights, hand_size: int) -> PayoutTable:
+    """Counts the odds of every poker hand over the rank multisets of `hand_size` cards.
+
+    `hand_size` is between 1 and `MAX_PLAYED_HAND_SIZE`.
+    """
+    total_weight: int = sum(weights.values())
+    rank_weights: Counter[Rank] = Counter()
+    suit_rank_weights: dict[Suit, Counter[Rank]] = {suit: Counter() for suit in Suit}
+    for (suit, rank), weight in weights.items():
+        rank_weights[rank] += weight
+        suit_rank_weights[suit][rank] += weight
+
+    hand_weights: Counter[PokerHand] = Counter()
+    payout_weight: int = 0
+
+    for ranks in itertools.combinations_with_replacement(sorted(rank_weights), hand_size):
+        rank_count: Counter[Rank] = Counter(ranks)
+        # Orderings of the draws that end up with this multiset
+        orderings: int = math.factorial(hand_size)
+        for count in rank_count.values():
+            orderings //= math.factorial(count)
+
+        weight: int = orderings * math.prod(rank_weights[r] ** n for r, n in rank_count.items())
+
+        flush_weight: int = 0
+        if hand_size >= FLUSH_SIZE:
+            flush_weight = orderings * sum(
+                math.prod(suit_rank_weights[suit][r] ** n for r, n in rank_count.items())
+                for suit in Suit
+            )
+
+        for is_flush, case_weight in ((True, flush_weight), (False, weight - flush_weight)):
+            if case_weight == 0:
+                continue
+            poker_hand, payout = _eval_representative(ranks, is_flush)
+            hand_weights[poker_hand] += case_weight
+            payout_weight += case_weight * payout
+
+    draws: int = total_weight**hand_size
+    expected_payout = Fraction(payout_weight, draws)
+    return PayoutTable(
+        hand_size,
+        {hand: Fraction(hand_weights[hand], draws) for hand in PokerHand if hand_weights[hand]},
+        expected_payout,
+        expected_payout / hand_size,
+    )
+
+
+def compute_payout_tables(
+    columns: list[Column],
+    cache_dir: str | None = DEFAULT_CACHE_DIR,
+) -> list[PayoutTable]:
+    """Returns a table per hand size from 1 to `MAX_PLAYED_HAND_SIZE`, cached in `cache_dir`.
+
+    `None` disables the cache.
+    """
+    weights: CardWeights = column_card_weights(columns)
+
+    cache_path: str | None = None
+    if cache_dir is not None:
+        cache_path = os.path.join(cache_dir, payout_cache_key(weights) + ".json")
+        if os.path.exists(cache_path):
+            with open(cache_path) as f:
+                return [_table_from_json(table) for table in json.load(f)]
+
+    tables: list[PayoutTable] = [
+        compute_payout_table(weights, hand_size) for hand_size in range(1, MAX_PLAYED_HAND_SIZE + 1)
+    ]
+
+    if cache_path is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Written next to the cache file first, so readers never see a partial file
+        temp_path: str = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump([_table_to_json(table) for table in tables], f, indent=2)
+        os.replace(temp_path, cache_path)
+
+    return tables
+
+
+def payout_cache_key(weights: CardWeights) -> str:
+    """Hashes everything a payout table depends on: card weights, coin values and hand sizes."""
+    key: dict[str, object] = {
+        "version": _CACHE_VERSION,
+        "max_hand_size": MAX_PLAYED_HAND_SIZE,
+        "weights": sorted([suit.name, rank.name, w] for (suit, rank), w in weights.items()),
+        "poker_hand_coin_value": sorted([h.name, v] for h, v in POKER_HAND_COIN_VALUE.items()),
+        "rank_coin_value": sorted([r.name, v] for r, v in RANK_COIN_VALUE.items()),
+    }
+    return hashlib.sha256(json.dumps(key).encode("utf-8")).hexdigest()
+
+
+def return_to_player(table: PayoutTable, spin_count: int) -> float:
+    """Coins a card returns per coin spent on the spin that drew it, at `spin_count` spins."""
+    return float(table.expected_payout_per_card / calc_spin_cost(spin_count))
+
+
+def _eval_representative(ranks: tuple[Rank, ...], is_flush: bool) -> tuple[PokerHand, int]:
+    """Evaluates a hand with `ranks` whose cards share a suit only when `is_flush`."""
+    suits: list[Suit] = [Suit.SPADE] * len(ranks)
+    if not is_flush and len(ranks) > 1:
+        suits[-1] = Suit.HEART
+
+    cards: list[PlayingCard] = [PlayingCard(suit, rank) for suit, rank in zip(suits, ranks)]
+    poker_hand, scoring_cards = eval_poker_hand(cards)
+    payout: int = POKER_HAND_COIN_VALUE[poker_hand] + sum(
+        RANK_COIN_VALUE[card.rank] for card in scoring_cards
+    )
+    return poker_hand, payout
+
+
+def _table_to_json(table: PayoutTable) -> dict[str, object]:
+    return {
+        "hand_size": table.hand_size,
+        "probabilities": {hand.name: str(p) for hand, p in table.probabilities.items()},
+        "expected_payout": str(table.expected_payout),
+        "expected_payout_per_card": str(table.expected_payout_per_card),
+    }
+
+
+def _table_from_json(data: dict) -> PayoutTable:
+    return PayoutTable(
+        data["hand_size"],
+        {PokerHand[hand]: Fraction(p) for hand, p in data["probabilities"].items()},
+        Fraction(data["expected_payout"]),
+        Fraction(data["expected_payout_per_card"]),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--no-cache", action="store_true", help="always recompute the tables")
+    parser.add_argument(
+        "--spin-counts",
+        default="0,10,30,60",
+        help="comma separated spin counts to report the return to player at",
+    )
+    args = parser.parse_args()
+
+    # The odds don't depend on the shuffle, only on which cards the columns hold
+    columns: list[Column] = create_context(1, 1).slots.columns
+    tables: list[PayoutTable] = compute_payout_tables(
+        columns, None if args.no_cache else DEFAULT_CACHE_DIR
+    )
+    spin_counts: list[int] = [int(count) for count in args.spin_counts.split(",")]
+
+    for table in tables:
+        print(f"{table.hand_size} card hands")
+        for hand, probability in sorted(table.probabilities.items(), reverse=True):
+            print(f"  {hand.name.lower():<16}{float(probability):>12.6%}")
+        print(f"  expected payout {float(table.expected_payout):.3f} coins")
+        print(f"  per card        {float(table.expected_payout_per_card):.3f} coins")
+        for spin_count in spin_counts:
+            print(f"  rtp at spin {spin_count:<4}{return_to_player(table, spin_count):>9.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,19 @@
 from dataclasses import dataclass
 from enum import IntEnum
 
-from term_slots.renderer import RGBA, DrawCall, RichText
+from term_slots.renderer import (
+    RGBA,
+    DrawBatch,
+    DrawCall,
+    RichText,
+    compile_draw_calls,
+    offset_batch,
+)
 
 DEFAULT_CARD_BG_COLOR: RGBA = RGBA.WHITE
 PLAYING_CARD_WIDTH: int = 3
+# Height of `render_card_big`, small cards are a single row
+PLAYING_CARD_HEIGHT: int = 3
 
 
 class Suit(IntEnum):
@@ -36,6 +45,14 @@ class PlayingCard:
     rank: Rank
 
 
+@dataclass
+class CardAtlas:
+    """Small and big rendering of every card, compiled once as sprites drawn at the origin."""
+
+    small: dict[tuple[Suit, Rank], DrawBatch]
+    big: dict[tuple[Suit, Rank], DrawBatch]
+
+
 SUIT_COLOR: dict[Suit, RGBA] = {
     Suit.SPADE: RGBA.BLACK,
     Suit.CLUB: RGBA.BLACK,
@@ -150,3 +167,29 @@ def render_card_big(x, y, card: PlayingCard) -> list[DrawCall]:
         draw_calls.append(DrawCall(x, y + row_index, rich_text))
 
     return draw_calls
+
+
+def build_card_atlas() -> CardAtlas:
+    return CardAtlas(
+        small={
+            (card.suit, card.rank): compile_draw_calls([render_card_small(0, 0, card)])
+            for card in FULL_DECK
+        },
+        big={
+            (card.suit, card.rank): compile_draw_calls(render_card_big(0, 0, card))
+            for card in FULL_DECK
+        },
+    )
+
+
+def card_sprite_small(x: int, y: int, card: PlayingCard) -> DrawBatch:
+    """Same cells as `render_card_small`, placed from the atlas without compiling."""
+    return offset_batch(CARD_ATLAS.small[(card.suit, card.rank)], x, y)
+
+
+def card_sprite_big(x: int, y: int, card: PlayingCard) -> DrawBatch:
+    """Same cells as `render_card_big`, placed from the atlas without compiling."""
+    return offset_batch(CARD_ATLAS.big[(card.suit, card.rank)], x, y)
+
+
+CARD_ATLAS: CardAtlas = build_card_atlas()
@@ -1,8 +1,9 @@
 from dataclasses import dataclass
 
+from term_slots.config import Config
 from term_slots.context import elapsed_fraction
 from term_slots.curves import ease_in
-from term_slots.renderer import DrawCall, RichText, mul_darken
+from term_slots.renderer import DrawCall, Layer, RichText, compile_draw_calls
 
 
 @dataclass
@@ -14,8 +15,16 @@ class TextPopup:
     start_timestamp: float
 
 
-def render_all_text_popups(all_text_popups: list[TextPopup], game_time: float) -> list[DrawCall]:
-    draw_calls: list[DrawCall] = []
+def calc_text_popups_frame_rate(all_text_popups: list[TextPopup], config: Config) -> float:
+    """Popups fade continuously, so any active popup needs the full frame rate."""
+    if all_text_popups:
+        return config.max_fps
+    return 0.0
+
+
+def render_all_text_popups(all_text_popups: list[TextPopup], game_time: float) -> list[Layer]:
+    """Returns one layer per popup, faded through the layer opacity."""
+    layers: list[Layer] = []
 
     for popup in all_text_popups:
         t: float = elapsed_fraction(game_time, popup.start_timestamp, popup.duration_sec)
@@ -23,19 +32,10 @@ def render_all_text_popups(all_text_popups: list[TextPopup], game_time: float) -
         if t >= 1.0:
             continue
 
-        rich_text: RichText = popup.text
-
-        rich_text = mul_darken(rich_text, _calc_popup_alpha(t))
-
-        draw_calls.append(
-            DrawCall(
-                popup.x,
-                popup.y,
-                rich_text,
-            )
-        )
+        draw_call = DrawCall(popup.x, popup.y, popup.text)
+        layers.append(Layer([compile_draw_calls([draw_call])], _calc_popup_alpha(t)))
 
-    return draw_calls
+    return layers
 
 
 def _calc_popup_alpha(t: float) -> float:
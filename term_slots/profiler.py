@@ -0,0 +1,160 @@
+import json
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+
+import numpy as np
+
+from term_slots.renderer import RGBA, DrawCall, RichText, lerp_rgb
+
+
+class Phase(Enum):
+    INPUT = 0
+    ACTIONS = 1
+    GAME_LOGIC = 2
+    DRAW_CALLS = 3
+    RASTERIZE = 4
+    DIFF = 5
+    ENCODE = 6
+    WRITE = 7
+
+
+PERCENTILES: tuple[float, ...] = (50.0, 95.0, 99.0)
+# Rows of `render_profiler_overlay`: header, one per phase and the output counters
+OVERLAY_HEIGHT: int = len(Phase) + 2
+HISTOGRAM_BINS: int = 16
+_HISTOGRAM_BLOCKS: str = " ▁▂▃▄▅▆▇█"
+
+
+@dataclass
+class FrameProfiler:
+    """Per phase timings of the last `capacity` rendered frames, in seconds."""
+
+    capacity: int = 1024
+    # Ring buffer, one column per frame
+    samples: np.ndarray = field(init=False)  # shape (len(Phase), capacity), dtype=float64
+    # Timings of the frame that is currently being profiled
+    current: np.ndarray = field(init=False)  # shape (len(Phase),), dtype=float64
+    frame_count: int = 0
+    overlay_enabled: bool = False
+
+    def __post_init__(self):
+        self.samples = np.zeros((len(Phase), self.capacity), dtype=np.float64)
+        self.current = np.zeros(len(Phase), dtype=np.float64)
+
+
+def begin_frame(profiler: FrameProfiler) -> float:
+    """Starts profiling a frame, returns the timestamp to pass to `profile_phase`."""
+    profiler.current[:] = 0.0
+    return time.perf_counter()
+
+
+def profile_phase(profiler: FrameProfiler, phase: Phase, started: float) -> float:
+    """Adds the time since `started` to `phase`, returns the current timestamp.
+
+    The returned timestamp is the start of whatever phase follows, so phases
+    can be chained without extra `time.perf_counter()` calls.
+    """
+    now: float = time.perf_counter()
+    profiler.current[phase.value] += now - started
+    return now
+
+
+def end_frame(profiler: FrameProfiler) -> None:
+    profiler.samples[:, profiler.frame_count % profiler.capacity] = profiler.current
+    profiler.frame_count += 1
+
+
+def recorded_samples(profiler: FrameProfiler) -> np.ndarray:
+    """Returns the recorded timings oldest first, shape (len(Phase), frames)."""
+    if profiler.frame_count <= profiler.capacity:
+        return profiler.samples[:, : profiler.frame_count]
+    return np.roll(profiler.samples, -(profiler.frame_count % profiler.capacity), axis=1)
+
+
+def phase_percentiles(profiler: FrameProfiler) -> np.ndarray:
+    """Returns the `PERCENTILES` of every phase, shape (len(Phase), len(PERCENTILES))."""
+    samples: np.ndarray = recorded_samples(profiler)
+    if samples.shape[1] == 0:
+        return np.zeros((len(Phase), len(PERCENTILES)), dtype=np.float64)
+    return np.percentile(samples, PERCENTILES, axis=1).T
+
+
+def render_profiler_overlay(
+    x: int, y: int, profiler: FrameProfiler, output_counters: dict[str, int]
+) -> list[DrawCall]:
+    """Renders a table of phase timings in milliseconds with a histogram per phase.
+
+    The last row shows `output_counters`, see `output.output_counters`.
+    """
+    draw_calls: list[DrawCall] = []
+    bg_color: RGBA = RGBA(0.0, 0.0, 0.0, 0.8)
+    header_color: RGBA = lerp_rgb(RGBA.GOLD, RGBA.WHITE, 0.5)
+    text_color: RGBA = RGBA.WHITE * 0.8
+    histogram_color: RGBA = lerp_rgb(RGBA.GREEN, RGBA.WHITE, 0.4)
+
+    header: str = f"{'phase':<11}{'p50':>7}{'p95':>7}{'p99':>7}  histogram (0 - p99)"
+    draw_calls.append(DrawCall(x, y, RichText(header, header_color, bg_color)))
+
+    samples: np.ndarray = recorded_samples(profiler)
+    percentiles: np.ndarray = phase_percentiles(profiler) * 1000.0
+
+    for phase in Phase:
+        row_y: int = y + 1 + phase.value
+        p50, p95, p99 = percentiles[phase.value].tolist()
+        row: str = f"{phase.name.lower():<11}{p50:7.2f}{p95:7.2f}{p99:7.2f}  "
+        draw_calls.append(DrawCall(x, row_y, RichText(row, text_color, bg_color)))
+
+        histogram: str = _render_histogram(samples[phase.value])
+        draw_calls.append(
+            DrawCall(x + len(row), row_y, RichText(histogram, histogram_color, bg_color))
+        )
+
+    counters: str = "  ".join(
+        f"{name.replace('_', ' ')} {value}" for name, value in output_counters.items()
+    )
+    draw_calls.append(
+        DrawCall(x, y + 1 + len(Phase), RichText(f"{'output':<11}{counters}", text_color, bg_color))
+    )
+
+    return draw_calls
+
+
+def dump_profile(profiler: FrameProfiler, path: str, output_counters: dict[str, int]) -> None:
+    """Writes the percentiles and raw timings (in milliseconds) of every phase to `path` as JSON.
+
+    `output_counters` are written alongside, see `output.output_counters`.
+    """
+    samples: np.ndarray = recorded_samples(profiler) * 1000.0
+    percentiles: np.ndarray = phase_percentiles(profiler) * 1000.0
+
+    profile: dict[str, object] = {
+        "frames": profiler.frame_count,
+        "phases": {
+            phase.name.lower(): {
+                "percentiles_ms": dict(
+                    zip((f"p{p:g}" for p in PERCENTILES), percentiles[phase.value].tolist())
+                ),
+                "samples_ms": samples[phase.value].tolist(),
+            }
+            for phase in Phase
+        },
+        "output": output_counters,
+    }
+
+    with open(path, "w") as f:
+        json.dump(profile, f, indent=2)
+
+
+def _render_histogram(samples: np.ndarray) -> str:
+    if len(samples) == 0:
+        return " " * HISTOGRAM_BINS
+
+    # Outliers past p99 are left out so they don't squash the rest of the histogram
+    upper: float = float(np.percentile(samples, 99.0))
+    if upper <= 0.0:
+        upper = 1.0
+    counts, _ = np.histogram(samples, bins=HISTOGRAM_BINS, range=(0.0, upper))
+
+    levels = np.ceil(counts / max(int(counts.max()), 1) * (len(_HISTOGRAM_BLOCKS) - 1))
+    return "".join(_HISTOGRAM_BLOCKS[level] for level in levels.astype(np.int64).tolist())
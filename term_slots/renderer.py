@@ -1,17 +1,38 @@
-import sys
-import time
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from typing import Callable, ClassVar
+from enum import Enum, auto
+from typing import ClassVar
 
 import numpy as np
 from blessed import Terminal
 
-# A cell is (character, style)
-ScreenCell = tuple[str, str]
+from term_slots.output import (
+    SYNC_UPDATE_BEGIN,
+    SYNC_UPDATE_END,
+    OutputMonitor,
+    write_frame,
+    write_monitored,
+)
+
+# A cell is (character, packed fg, packed bg, attribute bits)
+ScreenCell = tuple[str, int, int, int]
+
+# Cell attribute bits stored in `ScreenBuffer.attrs`
+ATTR_BOLD: int = 1 << 0
 
 
 @dataclass
+class ColorAllocStats:
+    # `RGBA` instances constructed so far
+    allocated: int = 0
+    # `intern_rgba` calls that returned an existing instance
+    intern_hits: int = 0
+
+
+@dataclass(frozen=True, slots=True)
 class RGBA:
+    """Immutable color, derived colors are shared through `intern_rgba`."""
+
     r: float
     g: float
     b: float
@@ -29,16 +50,19 @@ class RGBA:
     GOLD: ClassVar[RGBA]
     CYAN: ClassVar[RGBA]
 
+    def __post_init__(self):
+        COLOR_ALLOC_STATS.allocated += 1
+
     def __mul__(self, other: float | RGBA):
         if isinstance(other, RGBA):
-            return RGBA(
+            return intern_rgba(
                 min(1.0, self.r * other.r),
                 min(1.0, self.g * other.g),
                 min(1.0, self.b * other.b),
                 min(1.0, self.a * other.a),
             )
 
-        return RGBA(
+        return intern_rgba(
             min(1.0, self.r * other),
             min(1.0, self.g * other),
             min(1.0, self.b * other),
@@ -46,6 +70,38 @@ class RGBA:
         )
 
 
+COLOR_ALLOC_STATS: ColorAllocStats = ColorAllocStats()
+
+# Upper bound of `_INTERNED_COLORS`, colors past it are allocated without being shared
+_INTERNED_COLORS_MAX: int = 1 << 16
+
+# Interned colors keyed on their 8 bit channels packed as 0xRRGGBBAA
+_INTERNED_COLORS: dict[int, RGBA] = {}
+
+
+def intern_rgba(r: float, g: float, b: float, a: float = 1.0) -> RGBA:
+    """Returns a shared `RGBA` instance with each channel snapped to 8 bits.
+
+    The renderer only outputs 8 bits per channel, so derived colors (lerps,
+    darkening) are deduplicated this way instead of allocating per call.
+    """
+    ri: int = _channel_to_int(r)
+    gi: int = _channel_to_int(g)
+    bi: int = _channel_to_int(b)
+    ai: int = _channel_to_int(a)
+    key: int = (ri << 24) | (gi << 16) | (bi << 8) | ai
+
+    color: RGBA | None = _INTERNED_COLORS.get(key)
+    if color is not None:
+        COLOR_ALLOC_STATS.intern_hits += 1
+        return color
+
+    color = RGBA(ri / 255.0, gi / 255.0, bi / 255.0, ai / 255.0)
+    if len(_INTERNED_COLORS) < _INTERNED_COLORS_MAX:
+        _INTERNED_COLORS[key] = color
+    return color
+
+
 # Color constants
 RGBA.WHITE = RGBA(1.0, 1.0, 1.0)
 RGBA.BLACK = RGBA(0.0, 0.0, 0.0)
@@ -72,22 +128,33 @@ class RichText:
 class Screen:
     width: int
     height: int
+    # Front buffer, mirrors what is currently displayed by the terminal
     old_buffer: ScreenBuffer = field(init=False)
+    # Back buffer, the frame that is currently being drawn
     new_buffer: ScreenBuffer = field(init=False)
+    # Blank template the back buffer is reset from after every diff
+    cleared_buffer: ScreenBuffer = field(init=False)
 
     def __post_init__(self):
         self.old_buffer = create_buffer(self.width, self.height)
         self.new_buffer = create_buffer(self.width, self.height)
+        self.cleared_buffer = create_buffer(self.width, self.height)
+        # Nothing is known about what the terminal displays yet, so the first
+        # frame writes every cell, painting the background over the terminal's own
+        invalidate_buffer(self.old_buffer)
 
 
 @dataclass
 class ScreenBuffer:
     width: int
     height: int
-    chars: np.ndarray  # shape (height, width), dtype='<U1'
-    styles: (
-        np.ndarray
-    )  # shape (height, width), dtype=object, each element: (fg: RGB, bg: RGB, bold: bool)
+    chars: np.ndarray  # shape (height, width), dtype=uint32, unicode codepoints
+    fg: np.ndarray  # shape (height, width), dtype=uint32, packed 0xRRGGBB
+    bg: np.ndarray  # shape (height, width), dtype=uint32, packed 0xRRGGBB
+    attrs: np.ndarray  # shape (height, width), dtype=uint8, `ATTR_*` bitfield
+    # Damaged column span [damage_x0, damage_x1) of every row, empty when x0 >= x1
+    damage_x0: np.ndarray  # shape (height,), dtype=int32
+    damage_x1: np.ndarray  # shape (height,), dtype=int32
 
 
 @dataclass
@@ -97,6 +164,51 @@ class DrawCall:
     rich_text: RichText
 
 
+@dataclass
+class DrawBatch:
+    """Cells of a list of draw calls compiled into flat arrays, in draw order.
+
+    A space in `chars` keeps the existing character, fg and attributes of the
+    cell. Both `fg` and `bg` are blended over the existing background by their
+    alpha, so a bg alpha of 0.0 (`bg_color=None`) keeps it.
+    """
+
+    ys: np.ndarray  # shape (n,), dtype=int32
+    xs: np.ndarray  # shape (n,), dtype=int32
+    chars: np.ndarray  # shape (n,), dtype=uint32, unicode codepoints
+    fg: np.ndarray  # shape (n, 4), dtype=float32, RGBA
+    bg: np.ndarray  # shape (n, 4), dtype=float32, RGBA
+    attrs: np.ndarray  # shape (n,), dtype=uint8, `ATTR_*` bitfield
+
+
+@dataclass
+class Layer:
+    """Draw batches that are composited over the layers below with a shared opacity."""
+
+    batches: list[DrawBatch] = field(default_factory=list)
+    opacity: float = 1.0
+
+
+class ColorMode(Enum):
+    TRUECOLOR = auto()
+    COLOR_256 = auto()
+    COLOR_16 = auto()
+
+
+@dataclass
+class StyleCache:
+    """Bounded LRU of encoded color escape sequences keyed on `(is_bg, packed color)`.
+
+    All entries are encoded for `color_mode`, use `set_color_mode` to change it.
+    """
+
+    color_mode: ColorMode = ColorMode.TRUECOLOR
+    max_size: int = 1024
+    entries: OrderedDict[tuple[bool, int], bytes] = field(default_factory=OrderedDict)
+    hits: int = 0
+    misses: int = 0
+
+
 @dataclass
 class FPSCounter:
     ema: float = 0.0
@@ -106,15 +218,25 @@ class FPSCounter:
 def mul_darken(rich_text: RichText, value: float) -> RichText:
     """Multiplies the alpha of `text_color` and `bg_color` if applicable."""
 
-    new_text_color: RGBA = lerp_rgb(RGBA.BLACK, rich_text.text_color, value)
+    new_text_color: RGBA = _darken(rich_text.text_color, value)
     new_bg_color: RGBA | None = rich_text.bg_color
 
     if new_bg_color:
-        new_bg_color = lerp_rgb(RGBA.BLACK, new_bg_color, value)
+        new_bg_color = _darken(new_bg_color, value)
 
     return RichText(rich_text.text, new_text_color, new_bg_color, rich_text.bold)
 
 
+def _darken(color: RGBA, value: float) -> RGBA:
+    """Same as `lerp_rgb(RGBA.BLACK, color, value)`."""
+    if value <= 0.0:
+        return RGBA.BLACK
+    if value >= 1.0:
+        return color
+
+    return intern_rgba(color.r * value, color.g * value, color.b * value)
+
+
 def lerp_rgb(a: RGBA, b: RGBA, t: float) -> RGBA:
     """
     Linear interpolation between two RGB colors.
@@ -127,109 +249,305 @@ def lerp_rgb(a: RGBA, b: RGBA, t: float) -> RGBA:
     if t >= 1.0:
         return b
 
-    return RGBA(
+    return intern_rgba(
         a.r + (b.r - a.r) * t,
         a.g + (b.g - a.g) * t,
         a.b + (b.b - a.b) * t,
     )
 
 
+# Shared by all `flush_diffs` calls that don't pass their own cache
+STYLE_CACHE: StyleCache = StyleCache()
+# Reused by all `flush_diffs` calls to encode frames into
+FRAME_BUFFER: bytearray = bytearray()
+
+
 def create_buffer(width: int, height: int) -> ScreenBuffer:
-    chars = np.full((height, width), " ", dtype="<U1")
-    # store default style: white text on background color, not bold
-    default_style = np.empty((height, width), dtype=object)
-    for y in range(height):
-        for x in range(width):
-            default_style[y, x] = (None, RGBA.BLACK, False)
-    return ScreenBuffer(width, height, chars, default_style)
+    # default cell: blank, white text on black background, not bold
+    chars = np.full((height, width), ord(" "), dtype=np.uint32)
+    fg = np.full((height, width), pack_rgb(RGBA.WHITE), dtype=np.uint32)
+    bg = np.full((height, width), pack_rgb(RGBA.BLACK), dtype=np.uint32)
+    attrs = np.zeros((height, width), dtype=np.uint8)
+    damage_x0 = np.full(height, width, dtype=np.int32)
+    damage_x1 = np.zeros(height, dtype=np.int32)
+    return ScreenBuffer(width, height, chars, fg, bg, attrs, damage_x0, damage_x1)
 
 
-def buffer_diff(screen: Screen) -> list[tuple[int, int, ScreenCell]]:
-    old = screen.old_buffer
-    new = screen.new_buffer
+def mark_full_damage(buf: ScreenBuffer) -> None:
+    buf.damage_x0[:] = 0
+    buf.damage_x1[:] = buf.width
 
-    # per-char difference
-    mask_chars = old.chars != new.chars
 
-    # explicit per-cell style comparison (fg, bg, bold)
-    def style_neq(a, b):
-        return a[0] != b[0] or a[1] != b[1] or a[2] != b[2]
+def pack_rgb(color: RGBA) -> int:
+    """Packs the RGB channels of `color` into a 24-bit 0xRRGGBB integer."""
+    r, g, b = _rgb_to_rgb_int(color)
+    return (r << 16) | (g << 8) | b
 
-    # use numpy.frompyfunc to vectorize the python comparator
-    style_cmp = np.frompyfunc(style_neq, 2, 1)
-    mask_styles = style_cmp(old.styles, new.styles).astype(bool)
 
-    mask = mask_chars | mask_styles
-    ys, xs = np.nonzero(mask)
+def copy_buffer(dst: ScreenBuffer, src: ScreenBuffer) -> None:
+    """Copies the cell contents of `src` into `dst` without reallocating."""
+    np.copyto(dst.chars, src.chars)
+    np.copyto(dst.fg, src.fg)
+    np.copyto(dst.bg, src.bg)
+    np.copyto(dst.attrs, src.attrs)
+    np.copyto(dst.damage_x0, src.damage_x0)
+    np.copyto(dst.damage_x1, src.damage_x1)
 
-    diffs = [(int(y), int(x), (new.chars[y, x], new.styles[y, x])) for y, x in zip(ys, xs)]
 
-    # Update buffers
-    screen.old_buffer = ScreenBuffer(new.width, new.height, new.chars.copy(), new.styles.copy())
-    screen.new_buffer = create_buffer(screen.width, screen.height)
+# Not a valid unicode codepoint, so never drawn
+_INVALID_CHAR: int = 0xFFFFFFFF
 
-    return diffs  # pyright: ignore
 
+def resize_screen(screen: Screen, width: int, height: int) -> None:
+    """Resizes all buffers of `screen` in place and forces a full repaint.
 
-def flush_diffs(term: Terminal, diffs: list[tuple[int, int, ScreenCell]]) -> None:
-    output = []
-    for y, x, (char, style) in diffs:
-        if isinstance(style, tuple):
-            fg, bg, bold = style
-            style_str = _make_style(term, fg, bg, bold)
-        else:
-            style_str = style  # fallback in case
+    The terminal reflows or clears its contents on resize, so the front buffer
+    no longer mirrors what is displayed and every cell is written again.
+    """
+    screen.width = width
+    screen.height = height
+    for buf in (screen.old_buffer, screen.new_buffer, screen.cleared_buffer):
+        resize_buffer(buf, width, height)
 
-        output.append(term.move_xy(int(x), int(y)) + style_str + char + term.normal)
+    invalidate_buffer(screen.old_buffer)
+    mark_full_damage(screen.new_buffer)
 
-    sys.stdout.write("".join(output))
-    sys.stdout.flush()
 
+def resize_buffer(buf: ScreenBuffer, width: int, height: int) -> None:
+    """Resizes `buf` to `width` x `height`, keeping the cells in the overlapping region.
 
-def create_fps_limiter(
-    fps: float,
-    poll_interval: float = 0.001,
-    spin_reserve: float = 0.002,
-) -> Callable[[], float]:
-    """
-    High-precision, drift-correcting frame limiter.
-    Keeps perfect alignment with wall time to avoid visible jitter.
+    The planes are views into storage that only ever grows, so shrinking and
+    growing back within the largest size seen so far doesn't allocate.
     """
-    target = 1.0 / float(fps)
-    next_frame = time.perf_counter() + target
+    keep_width: int = min(width, buf.width)
+    keep_height: int = min(height, buf.height)
+
+    buf.chars = _resize_plane(buf.chars, width, height, keep_width, keep_height, ord(" "))
+    buf.fg = _resize_plane(buf.fg, width, height, keep_width, keep_height, pack_rgb(RGBA.WHITE))
+    buf.bg = _resize_plane(buf.bg, width, height, keep_width, keep_height, pack_rgb(RGBA.BLACK))
+    buf.attrs = _resize_plane(buf.attrs, width, height, keep_width, keep_height, 0)
+
+    buf.damage_x0 = _resize_row_storage(buf.damage_x0, height)
+    buf.damage_x1 = _resize_row_storage(buf.damage_x1, height)
+    np.minimum(buf.damage_x0, width, out=buf.damage_x0)
+    np.minimum(buf.damage_x1, width, out=buf.damage_x1)
+    # Rows uncovered by the resize start out undamaged
+    buf.damage_x0[keep_height:] = width
+    buf.damage_x1[keep_height:] = 0
+
+    buf.width = width
+    buf.height = height
+
+
+def invalidate_buffer(buf: ScreenBuffer) -> None:
+    """Makes every cell of `buf` compare unequal to any drawable cell."""
+    buf.chars[:, :] = _INVALID_CHAR
+    mark_full_damage(buf)
+
+
+def _resize_plane(
+    plane: np.ndarray,
+    width: int,
+    height: int,
+    keep_width: int,
+    keep_height: int,
+    fill_value: int,
+) -> np.ndarray:
+    storage: np.ndarray = plane if plane.base is None else plane.base
+    capacity_height, capacity_width = storage.shape
+
+    if height > capacity_height or width > capacity_width:
+        # Grow with some headroom, a window being dragged resizes many times in a row
+        grown = np.full(
+            (
+                _grow_capacity(capacity_height, height),
+                _grow_capacity(capacity_width, width),
+            ),
+            fill_value,
+            dtype=plane.dtype,
+        )
+        grown[:keep_height, :keep_width] = plane[:keep_height, :keep_width]
+        storage = grown
 
-    def wait_for_next_frame() -> float:
-        nonlocal next_frame
-        target_time = next_frame
-        now = time.perf_counter()
+    resized: np.ndarray = storage[:height, :width]
+    # Cells uncovered by the resize start out blank
+    resized[keep_height:, :] = fill_value
+    resized[:keep_height, keep_width:] = fill_value
+    return resized
 
-        # --- Sleep until close to target ---
-        while True:
-            remaining = target_time - now - spin_reserve
-            if remaining <= 0:
-                break
-            time.sleep(min(poll_interval, remaining))
-            now = time.perf_counter()
 
-        # --- Spin for last couple ms for precision ---
-        while time.perf_counter() < target_time:
-            pass
+def _resize_row_storage(rows: np.ndarray, height: int) -> np.ndarray:
+    storage: np.ndarray = rows if rows.base is None else rows.base
+    if height > len(storage):
+        grown = np.zeros(_grow_capacity(len(storage), height), dtype=rows.dtype)
+        grown[: len(rows)] = rows
+        storage = grown
+    return storage[:height]
 
-        end = time.perf_counter()
 
-        # --- Compute actual frame time ---
-        dt = end - (next_frame - target)
+def _grow_capacity(capacity: int, needed: int) -> int:
+    return max(needed, capacity + capacity // 2)
 
-        # --- Schedule next frame based on *absolute time*, not drifted increments ---
-        next_frame = target_time + target
 
-        # If we’re very late, resync instead of stacking drift
-        if end > next_frame:
-            next_frame = end + target
+def buffer_diff(screen: Screen) -> list[tuple[int, int, ScreenCell]]:
+    """Returns the cells that changed since the last call.
 
-        return dt
+    Only cells inside the union of this and the last frame's damage are
+    compared, everything outside of it is blank in both buffers.
 
-    return wait_for_next_frame
+    Swaps the front and back buffers afterwards and resets the new back buffer
+    from `screen.cleared_buffer`, so no buffers are allocated per frame.
+    """
+    old = screen.old_buffer
+    new = screen.new_buffer
+
+    # --- Flatten the damaged row spans into cell coordinates ---
+    damage_x0 = np.minimum(old.damage_x0, new.damage_x0)
+    damage_x1 = np.maximum(old.damage_x1, new.damage_x1)
+    rows = np.flatnonzero(damage_x1 > damage_x0)
+    span_x0 = damage_x0[rows]
+    span_lengths = damage_x1[rows] - span_x0
+
+    ys = np.repeat(rows, span_lengths)
+    span_starts = np.repeat(np.cumsum(span_lengths) - span_lengths, span_lengths)
+    xs = np.repeat(span_x0, span_lengths) + (np.arange(len(ys)) - span_starts)
+
+    # --- Compare the damaged cells ---
+    mask = old.chars[ys, xs] != new.chars[ys, xs]
+    mask |= old.fg[ys, xs] != new.fg[ys, xs]
+    mask |= old.bg[ys, xs] != new.bg[ys, xs]
+    mask |= old.attrs[ys, xs] != new.attrs[ys, xs]
+    ys = ys[mask]
+    xs = xs[mask]
+
+    diffs = list(
+        zip(
+            ys.tolist(),
+            xs.tolist(),
+            zip(
+                map(chr, new.chars[ys, xs].tolist()),
+                new.fg[ys, xs].tolist(),
+                new.bg[ys, xs].tolist(),
+                new.attrs[ys, xs].tolist(),
+            ),
+        )
+    )
+
+    # Ping-pong the buffers, the drawn frame becomes the displayed one
+    screen.old_buffer, screen.new_buffer = new, old
+    copy_buffer(screen.new_buffer, screen.cleared_buffer)
+
+    return diffs
+
+
+def flush_diffs(
+    term: Terminal,
+    diffs: list[tuple[int, int, ScreenCell]],
+    style_cache: StyleCache | None = None,
+    output_monitor: OutputMonitor | None = None,
+    synchronized: bool = False,
+) -> None:
+    """Writes `diffs` to `term.stream`, timing the write if `output_monitor` is given."""
+    output: bytearray = encode_diffs(term, diffs, style_cache, FRAME_BUFFER, synchronized)
+    if not output:
+        return
+
+    if output_monitor is not None:
+        write_monitored(output_monitor, term.stream, output)
+    else:
+        write_frame(term.stream, output)
+
+
+def encode_diffs(
+    term: Terminal,
+    diffs: list[tuple[int, int, ScreenCell]],
+    style_cache: StyleCache | None = None,
+    out: bytearray | None = None,
+    synchronized: bool = False,
+) -> bytearray:
+    """Encodes `diffs` (in row-major order) into the escape sequences that draw them.
+
+    Horizontally adjacent cells are written as one run without cursor moves and
+    the current SGR state is tracked so only the attributes that differ from the
+    previous cell are emitted. Color escapes come from `style_cache`, which
+    defaults to a cache shared by all calls.
+
+    The frame replaces the contents of `out` so one buffer can be reused across
+    frames. With `synchronized` it is framed as one synchronized update.
+    """
+    if style_cache is None:
+        style_cache = STYLE_CACHE
+    if out is None:
+        out = bytearray()
+    else:
+        out.clear()
+
+    if not diffs:
+        return out
+
+    styling: bool = term.does_styling
+    normal: bytes = term.normal.encode()
+    bold: bytes = term.bold.encode()
+
+    if synchronized:
+        out += SYNC_UPDATE_BEGIN
+
+    # Where the terminal cursor is after the last written cell
+    cursor_x: int = -1
+    cursor_y: int = -1
+
+    # SGR state of the terminal, `None` means unknown
+    current_fg: int | None = None
+    current_bg: int | None = None
+    current_fg_style: bytes | None = None
+    current_bg_style: bytes | None = None
+    current_attrs: int | None = None
+
+    for y, x, (char, fg, bg, attrs) in diffs:
+        # --- Start a new run ---
+        if x != cursor_x or y != cursor_y:
+            out += term.move_xy(x, y).encode()
+
+        # --- Style changes ---
+        if styling:
+            if current_attrs is None or current_attrs & ~attrs:
+                # Attributes can only be switched off through a full reset
+                out += normal
+                current_fg = None
+                current_bg = None
+                current_fg_style = None
+                current_bg_style = None
+                current_attrs = 0
+
+            if attrs & ~current_attrs & ATTR_BOLD:
+                out += bold
+            current_attrs = attrs
+
+            # Different colors can share an escape in the reduced color modes
+            if fg != current_fg:
+                fg_style: bytes = get_color_style(term, style_cache, fg, is_bg=False)
+                if fg_style != current_fg_style:
+                    out += fg_style
+                    current_fg_style = fg_style
+                current_fg = fg
+            if bg != current_bg:
+                bg_style: bytes = get_color_style(term, style_cache, bg, is_bg=True)
+                if bg_style != current_bg_style:
+                    out += bg_style
+                    current_bg_style = bg_style
+                current_bg = bg
+
+        out += char.encode()
+        cursor_x = x + 1
+        cursor_y = y
+
+    # Leave the terminal in its default state between frames
+    out += normal
+
+    if synchronized:
+        out += SYNC_UPDATE_END
+
+    return out
 
 
 def update_fps_counter(fps_counter: FPSCounter, dt: float) -> None:
@@ -242,24 +560,132 @@ def update_fps_counter(fps_counter: FPSCounter, dt: float) -> None:
         fps_counter.ema = fps_counter.ema * (1.0 - fps_counter.alpha) + inst * fps_counter.alpha
 
 
-def _make_style(term: Terminal, fg: RGBA | None, bg: RGBA | None, bold: bool) -> str:
-    if not term.does_styling:
-        return term.normal
+def detect_color_mode(term: Terminal) -> ColorMode:
+    if term.number_of_colors >= 1 << 24:
+        return ColorMode.TRUECOLOR
+    if term.number_of_colors >= 256:
+        return ColorMode.COLOR_256
+    return ColorMode.COLOR_16
+
+
+def set_color_mode(style_cache: StyleCache, color_mode: ColorMode) -> None:
+    """Switches the cache to `color_mode`, dropping entries encoded for the old one."""
+    if style_cache.color_mode == color_mode:
+        return
+    style_cache.color_mode = color_mode
+    style_cache.entries.clear()
+
+
+def get_color_style(term: Terminal, style_cache: StyleCache, color: int, is_bg: bool) -> bytes:
+    """Returns the encoded escape sequence selecting the packed `color` as fg or bg."""
+    key: tuple[bool, int] = (is_bg, color)
+
+    style: bytes | None = style_cache.entries.get(key)
+    if style is not None:
+        style_cache.hits += 1
+        style_cache.entries.move_to_end(key)
+        return style
+
+    style_cache.misses += 1
+    style = _make_color_style(term, color, is_bg, style_cache.color_mode).encode()
+    style_cache.entries[key] = style
+
+    if len(style_cache.entries) > style_cache.max_size:
+        style_cache.entries.popitem(last=False)
+
+    return style
+
+
+def quantize_color(color: int, color_mode: ColorMode) -> int:
+    """Maps a packed 0xRRGGBB color to its palette index in `color_mode`.
+
+    Uses a lookup table over a 5 bit per channel RGB cube that is built once
+    per mode, so no nearest color search happens per call.
+    """
+    lut: list[int] | None = _PALETTE_LUTS.get(color_mode)
+    if lut is None:
+        lut = _build_palette_lut(color_mode)
+        _PALETTE_LUTS[color_mode] = lut
+
+    shift: int = 8 - _LUT_CHANNEL_BITS
+    r: int = ((color >> 16) & 0xFF) >> shift
+    g: int = ((color >> 8) & 0xFF) >> shift
+    b: int = (color & 0xFF) >> shift
+    return lut[(r << (2 * _LUT_CHANNEL_BITS)) | (g << _LUT_CHANNEL_BITS) | b]
+
+
+def _make_color_style(term: Terminal, color: int, is_bg: bool, color_mode: ColorMode) -> str:
+    if color_mode == ColorMode.TRUECOLOR:
+        r, g, b = (color >> 16) & 0xFF, (color >> 8) & 0xFF, color & 0xFF
+        return term.on_color_rgb(r, g, b) if is_bg else term.color_rgb(r, g, b)
+
+    palette_index: int = quantize_color(color, color_mode)
+    return term.on_color(palette_index) if is_bg else term.color(palette_index)
+
+
+# Bits kept per channel when indexing the palette lookup tables
+_LUT_CHANNEL_BITS: int = 5
+
+_PALETTE_LUTS: dict[ColorMode, list[int]] = {}
+
+# Default xterm values of the 256 palette colors: 16 system colors, a 6x6x6 cube and 24 grays
+XTERM_PALETTE: list[tuple[int, int, int]] = [
+    (0, 0, 0),
+    (205, 0, 0),
+    (0, 205, 0),
+    (205, 205, 0),
+    (0, 0, 238),
+    (205, 0, 205),
+    (0, 205, 205),
+    (229, 229, 229),
+    (127, 127, 127),
+    (255, 0, 0),
+    (0, 255, 0),
+    (255, 255, 0),
+    (92, 92, 255),
+    (255, 0, 255),
+    (0, 255, 255),
+    (255, 255, 255),
+    *(
+        (r, g, b)
+        for r in (0, 95, 135, 175, 215, 255)
+        for g in (0, 95, 135, 175, 215, 255)
+        for b in (0, 95, 135, 175, 215, 255)
+    ),
+    *((v, v, v) for v in range(8, 248, 10)),
+]
+
+
+def _build_palette_lut(color_mode: ColorMode) -> list[int]:
+    if color_mode == ColorMode.COLOR_16:
+        first_index = 0
+        palette = np.array(XTERM_PALETTE[:16], dtype=np.int32)
+    else:
+        # The 16 system colors are user configurable, only match the 6x6x6 cube and grays
+        first_index = 16
+        palette = np.array(XTERM_PALETTE[16:], dtype=np.int32)
+
+    # Center of every quantized bucket
+    levels = np.arange(1 << _LUT_CHANNEL_BITS, dtype=np.int32) << (8 - _LUT_CHANNEL_BITS)
+    levels += 1 << (7 - _LUT_CHANNEL_BITS)
+    r, g, b = np.meshgrid(levels, levels, levels, indexing="ij")
+    buckets = np.stack((r.ravel(), g.ravel(), b.ravel()), axis=1)
 
-    # minimal fix: fallback to WHITE/BLACK if None
-    fg_rgb = _rgb_to_rgb_int(fg if fg is not None else RGBA.WHITE)
-    bg_rgb = _rgb_to_rgb_int(bg if bg is not None else RGBA.BLACK)
+    lut = np.empty(len(buckets), dtype=np.int32)
+    chunk_size = 4096
+    for start in range(0, len(buckets), chunk_size):
+        delta = buckets[start : start + chunk_size, None, :] - palette[None, :, :]
+        lut[start : start + chunk_size] = np.argmin((delta * delta).sum(axis=2), axis=1)
 
-    fg_str = term.color_rgb(*fg_rgb)
-    bg_str = term.on_color_rgb(*bg_rgb)
-    bold_str = term.bold if bold else ""
-    return f"{term.normal}{bold_str}{fg_str}{bg_str}"
+    return (lut + first_index).tolist()
 
 
 def _rgb_to_rgb_int(color: RGBA) -> tuple[int, int, int]:
-    arr = np.array((color.r, color.g, color.b), dtype=np.float64)
-    scaled = np.clip(np.round(arr * 255.0), 0, 255).astype(np.int32)
-    return int(scaled[0]), int(scaled[1]), int(scaled[2])
+    return _channel_to_int(color.r), _channel_to_int(color.g), _channel_to_int(color.b)
+
+
+def _channel_to_int(value: float) -> int:
+    return min(255, max(0, round(value * 255.0)))
 
 
 def print_at(
@@ -272,8 +698,6 @@ def print_at(
     """
     Respects the existing buffer background per character if seg.bg_color is None.
     """
-    buf: ScreenBuffer = screen.new_buffer
-
     # normalize to list of RichText
     if isinstance(text, str):
         segments = [RichText(text, RGBA.WHITE)]
@@ -282,54 +706,199 @@ def print_at(
     else:
         segments = [seg if isinstance(seg, RichText) else RichText(seg, RGBA.WHITE) for seg in text]
 
-    if not (0 <= y < buf.height):
-        return
-
+    draw_calls: list[DrawCall] = []
     px = x
     for seg in segments:
-        chars = list(seg.text)
-        for i, char in enumerate(chars):
-            cx = px + i
-            if cx >= buf.width:
-                break
-
-            existing_fg, existing_bg, existing_bold = buf.styles[y, cx]
-
-            # --- Handle background ---
-            if seg.bg_color is None:
-                # keep existing background
-                bg = existing_bg
-            else:
-                # fully opaque? just replace
-                if seg.bg_color.a >= 1.0:
-                    bg = seg.bg_color
-                else:
-                    # semi-transparent → blend over existing
-                    bg = _blend_rgba(seg.bg_color, existing_bg)
-
-            # --- Handle character transparency ---
-            if char == " ":
-                # keep the old character
-                fg = existing_fg
-                char_to_draw = buf.chars[y, cx]  # the old character stays
-                bold = existing_bold
-            else:
-                fg = seg.text_color
-                char_to_draw = char
-                bold = seg.bold
-
-            buf.chars[y, cx] = char_to_draw
-            buf.styles[y, cx] = (fg, bg, bold)
-
-        px += len(chars)
+        draw_calls.append(DrawCall(px, y, seg))
+        px += len(seg.text)
+
+    blit_batches(screen.new_buffer, [compile_draw_calls(draw_calls)])
+
+
+def compile_draw_calls(draw_calls: list[DrawCall]) -> DrawBatch:
+    """Flattens `draw_calls` into per-cell arrays that `blit_batches` can write at once.
+
+    Text is compiled fully opaque, the alpha of `text_color` is ignored like it
+    always has been. Use a `Layer` opacity to fade text.
+    """
+    ys: list[int] = []
+    xs: list[int] = []
+    chars: list[int] = []
+    fg: list[tuple[float, float, float, float]] = []
+    bg: list[tuple[float, float, float, float]] = []
+    attrs: list[int] = []
+
+    for draw_call in draw_calls:
+        rt: RichText = draw_call.rich_text
+        length: int = len(rt.text)
+        text_color: RGBA = rt.text_color
+        bg_color: RGBA | None = rt.bg_color
+
+        ys.extend([draw_call.y] * length)
+        xs.extend(range(draw_call.x, draw_call.x + length))
+        chars.extend(map(ord, rt.text))
+        fg.extend([(text_color.r, text_color.g, text_color.b, 1.0)] * length)
+        if bg_color is None:
+            bg.extend([(0.0, 0.0, 0.0, 0.0)] * length)
+        else:
+            bg.extend([(bg_color.r, bg_color.g, bg_color.b, bg_color.a)] * length)
+        attrs.extend([ATTR_BOLD if rt.bold else 0] * length)
+
+    return DrawBatch(
+        np.array(ys, dtype=np.int32),
+        np.array(xs, dtype=np.int32),
+        np.array(chars, dtype=np.uint32),
+        np.array(fg, dtype=np.float32).reshape(-1, 4),
+        np.array(bg, dtype=np.float32).reshape(-1, 4),
+        np.array(attrs, dtype=np.uint8),
+    )
+
+
+def concat_batches(batches: list[DrawBatch]) -> DrawBatch:
+    if len(batches) == 1:
+        return batches[0]
+
+    return DrawBatch(
+        np.concatenate([b.ys for b in batches]),
+        np.concatenate([b.xs for b in batches]),
+        np.concatenate([b.chars for b in batches]),
+        np.concatenate([b.fg for b in batches]),
+        np.concatenate([b.bg for b in batches]),
+        np.concatenate([b.attrs for b in batches]),
+    )
+
+
+def composite_layers(buf: ScreenBuffer, layers: list[Layer]) -> None:
+    """Composites `layers` bottom to top over the contents of `buf`."""
+    batches: list[DrawBatch] = []
+    for layer in layers:
+        if layer.opacity >= 1.0:
+            batches.extend(layer.batches)
+        elif layer.opacity > 0.0:
+            batches.extend(with_opacity(batch, layer.opacity) for batch in layer.batches)
+
+    blit_batches(buf, batches)
+
+
+def with_opacity(batch: DrawBatch, opacity: float) -> DrawBatch:
+    """Returns a copy of `batch` with the fg and bg alpha scaled by `opacity`."""
+    alpha_scale = np.array((1.0, 1.0, 1.0, opacity), dtype=np.float32)
+    return DrawBatch(
+        batch.ys,
+        batch.xs,
+        batch.chars,
+        batch.fg * alpha_scale,
+        batch.bg * alpha_scale,
+        batch.attrs,
+    )
+
+
+def offset_batch(batch: DrawBatch, x: int, y: int) -> DrawBatch:
+    """Returns `batch` moved by `x`, `y`, sharing everything but the positions with it.
+
+    Batches compiled at the origin work as sprites, compiled once and placed
+    anywhere for the cost of two array additions.
+    """
+    return DrawBatch(
+        batch.ys + np.int32(y),
+        batch.xs + np.int32(x),
+        batch.chars,
+        batch.fg,
+        batch.bg,
+        batch.attrs,
+    )
+
+
+def blend_over(top: np.ndarray, bottom: np.ndarray) -> np.ndarray:
+    """Vectorized source-over blending of RGBA `top` over opaque RGB `bottom`.
+
+    `top` has shape (..., 4) and `bottom` (..., 3), returns opaque RGB.
+    """
+    alpha = np.clip(top[..., 3:4], 0.0, 1.0)
+    return top[..., :3] * alpha + bottom * (1.0 - alpha)
+
+
+def blit_batches(buf: ScreenBuffer, batches: list[DrawBatch]) -> None:
+    """Writes `batches` into `buf` in order, as if every cell was drawn one by one.
+
+    Cells outside of the buffer are dropped. Cells that are drawn to more than
+    once are split into passes, pass `n` holding the `n`-th write of each cell,
+    so every pass can be applied with fancy indexing without losing draw order.
+    """
+    if not batches:
+        return
+
+    batch: DrawBatch = concat_batches(batches)
+
+    in_bounds = (batch.ys >= 0) & (batch.ys < buf.height)
+    in_bounds &= (batch.xs >= 0) & (batch.xs < buf.width)
+    ys = batch.ys[in_bounds]
+    xs = batch.xs[in_bounds]
+    if len(ys) == 0:
+        return
+
+    chars = batch.chars[in_bounds]
+    fg = batch.fg[in_bounds]
+    bg = batch.bg[in_bounds]
+    attrs = batch.attrs[in_bounds]
+
+    # --- Damage ---
+    np.minimum.at(buf.damage_x0, ys, xs)
+    np.maximum.at(buf.damage_x1, ys, xs + 1)
+
+    # --- Write order of every cell ---
+    cell_index = ys * buf.width + xs
+    order = np.argsort(cell_index, kind="stable")
+    sorted_cells = cell_index[order]
+    position = np.arange(len(order))
+    group_start = np.empty(len(order), dtype=bool)
+    group_start[0] = True
+    group_start[1:] = sorted_cells[1:] != sorted_cells[:-1]
+    write_rank = np.empty(len(order), dtype=np.int32)
+    write_rank[order] = position - np.maximum.accumulate(np.where(group_start, position, 0))
+
+    is_opaque_char = chars != ord(" ")
+    pass_count: int = int(write_rank.max()) + 1
+
+    for pass_index in range(pass_count):
+        in_pass = write_rank == pass_index if pass_count > 1 else np.ones(len(ys), dtype=bool)
+        pass_ys = ys[in_pass]
+        pass_xs = xs[in_pass]
+
+        # --- Background, blended over the existing one ---
+        existing_bg = unpack_rgb_array(buf.bg[pass_ys, pass_xs])
+        buf.bg[pass_ys, pass_xs] = pack_rgb_array(blend_over(bg[in_pass], existing_bg))
+
+        # --- Characters, spaces keep the existing character ---
+        # Text is blended over what was below this cell, not over its own bg
+        drawn = is_opaque_char[in_pass]
+        char_ys = pass_ys[drawn]
+        char_xs = pass_xs[drawn]
+        buf.chars[char_ys, char_xs] = chars[in_pass][drawn]
+        buf.fg[char_ys, char_xs] = pack_rgb_array(
+            blend_over(fg[in_pass][drawn], existing_bg[drawn])
+        )
+        buf.attrs[char_ys, char_xs] = attrs[in_pass][drawn]
+
+
+def pack_rgb_array(colors: np.ndarray) -> np.ndarray:
+    """Vectorized `pack_rgb`, `colors` has shape (..., 3) with channels in [0, 1]."""
+    channels = np.clip(np.round(colors * 255.0), 0, 255).astype(np.uint32)
+    return (channels[..., 0] << 16) | (channels[..., 1] << 8) | channels[..., 2]
+
+
+def unpack_rgb_array(packed: np.ndarray) -> np.ndarray:
+    """Inverse of `pack_rgb_array`, returns float32 RGB channels with shape (..., 3)."""
+    channels = np.stack(((packed >> 16) & 0xFF, (packed >> 8) & 0xFF, packed & 0xFF), axis=-1)
+    return channels.astype(np.float32) / 255.0
 
 
 def fill_screen_background(new_buffer: ScreenBuffer, color: RGBA) -> None:
-    new_buffer.chars[:, :] = " "
-    style_tuple = (RGBA.WHITE, color, False)
-    for y in range(new_buffer.height):
-        for x in range(new_buffer.width):
-            new_buffer.styles[y, x] = style_tuple
+    new_buffer.chars[:, :] = ord(" ")
+    new_buffer.fg[:, :] = pack_rgb(RGBA.WHITE)
+    new_buffer.bg[:, :] = pack_rgb(color)
+    new_buffer.attrs[:, :] = 0
+    mark_full_damage(new_buffer)
 
 
 def render_fps_counter(x: int, y: int, fps_counter: FPSCounter) -> list[DrawCall]:
@@ -341,23 +910,3 @@ def render_fps_counter(x: int, y: int, fps_counter: FPSCounter) -> list[DrawCall
     draw_instructions.append(DrawCall(x, y, RichText(fps_text, RGBA.WHITE)))
 
     return draw_instructions
-
-
-def _blend_rgba(top: RGBA, bottom: RGBA) -> RGBA:
-    """Source-over alpha blending"""
-    # clamp alpha
-    ta = max(0.0, min(1.0, top.a))
-    ba = max(0.0, min(1.0, bottom.a))
-
-    out_a = ta + ba * (1.0 - ta)  # resulting alpha
-
-    if out_a <= 0.0:
-        # fully transparent result
-        return RGBA(0.0, 0.0, 0.0, 0.0)
-
-    # blend each channel
-    out_r = (top.r * ta + bottom.r * ba * (1.0 - ta)) / out_a
-    out_g = (top.g * ta + bottom.g * ba * (1.0 - ta)) / out_a
-    out_b = (top.b * ta + bottom.b * ba * (1.0 - ta)) / out_a
-
-    return RGBA(out_r, out_g, out_b, out_a)
@@ -0,0 +1,79 @@
+import time
+from dataclasses import dataclass
+
+from blessed import Terminal
+
+
+@dataclass
+class FrameScheduler:
+    """Paces the main loop to a target frame rate by sleeping instead of spinning.
+
+    Waiting happens on the terminal input, so a keystroke or mouse event starts
+    the next frame right away instead of at the next frame boundary.
+    """
+
+    frame_time: float
+    # Input never starts frames closer together than this, so event storms
+    # such as mouse motion can't run the loop flat out
+    min_frame_time: float
+    # `time.perf_counter()` timestamps
+    next_frame: float
+    last_frame: float
+
+
+def create_frame_scheduler(fps: float) -> FrameScheduler:
+    frame_time: float = 1.0 / fps
+    now: float = time.perf_counter()
+    return FrameScheduler(frame_time, frame_time / 2.0, now + frame_time, now)
+
+
+def set_frame_rate(scheduler: FrameScheduler, fps: float, idle_frame_time: float) -> None:
+    """Changes the target frame rate, `0.0` waits `idle_frame_time` between frames.
+
+    The next frame is rescheduled from the start of the current one, so going
+    from idle to animating doesn't wait out the rest of the idle frame.
+    """
+    frame_time: float = 1.0 / fps if fps > 0.0 else idle_frame_time
+    if frame_time == scheduler.frame_time:
+        return
+
+    scheduler.frame_time = frame_time
+    scheduler.next_frame = scheduler.last_frame + frame_time
+
+
+def wait_for_next_frame(scheduler: FrameScheduler, term: Terminal) -> float:
+    """Blocks until the next frame is due or input arrives.
+
+    Returns the time elapsed since the previous frame started.
+    """
+    now: float = time.perf_counter()
+
+    # --- Wait out the minimum frame time regardless of input ---
+    earliest: float = scheduler.last_frame + scheduler.min_frame_time
+    if now < earliest:
+        time.sleep(earliest - now)
+        now = time.perf_counter()
+
+    # --- Block on the input until the frame is due ---
+    woken_by_input: bool = False
+    if now < scheduler.next_frame:
+        woken_by_input = term.kbhit(timeout=scheduler.next_frame - now)
+        now = time.perf_counter()
+
+        # Without a keyboard `kbhit` returns right away, sleep the rest instead
+        if not woken_by_input and now < scheduler.next_frame:
+            time.sleep(scheduler.next_frame - now)
+            now = time.perf_counter()
+
+    dt: float = now - scheduler.last_frame
+    scheduler.last_frame = now
+
+    # Frames started by input don't move the schedule, the rest stays aligned
+    # to absolute time instead of accumulating drift
+    if not woken_by_input:
+        scheduler.next_frame += scheduler.frame_time
+        # If we're very late, resync instead of trying to catch up
+        if now > scheduler.next_frame:
+            scheduler.next_frame = now + scheduler.frame_time
+
+    return dt
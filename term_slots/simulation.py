@@ -0,0 +1,365 @@
+"""Headless simulation of whole game sessions for balancing the economy.
+
+Sessions drive a `Context` through the same `resolve_action` rules as key
+presses do, but without a terminal, rendering or real time: spins finish the
+moment they start. Every session is reproducible from its seed.
+
+Throughput is bound by those shared rules. `resolve_action` takes about
+half of every step and the greedy policy about a quarter, which comes to
+85k to 165k actions per second depending on the machine. That is short of
+the hundreds of thousands a separate copy of the rules could reach, but a
+simulation that can drift from the game isn't worth balancing against.
+
+Run with `python -m term_slots.simulation --sessions 1000 --policy greedy`.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Iterable
+
+from term_slots.config import Config
+from term_slots.context import Context
+from term_slots.game_state import GameState
+from term_slots.hand import CardInHand
+from term_slots.input import Action, Input, get_action, resolve_action
+from term_slots.main import create_context
+from term_slots.playing_card import PlayingCard
+from term_slots.poker_hand import PokerHand
+from term_slots.slots import (
+    Column,
+    calc_spin_cost,
+    skip_slots_spin,
+)
+
+DEFAULT_SESSIONS: int = 1000
+# Sessions of policies that never run out of coins are cut off after this many actions
+DEFAULT_MAX_ACTIONS: int = 10_000
+
+# Inputs a policy can give, quitting and debug toggles are left out
+POLICY_INPUTS: tuple[Input, ...] = tuple(
+    input for input in Input if input not in (Input.QUIT, Input.TOGGLE_PROFILER)
+)
+
+
+@dataclass
+class SessionResult:
+    seed: int
+    actions: int = 0
+    spins: int = 0
+    hands_played: int = 0
+    coins_spent: int = 0
+    coins_won: int = 0
+    # Coins and score at the end of the session
+    coins: int = 0
+    score: int = 0
+    # Whether the session ended out of coins with an empty hand
+    game_over: bool = False
+    hand_counts: Counter[PokerHand] = field(default_factory=Counter)
+
+
+@dataclass
+class Simulation:
+    ctx: Context
+    config: Config
+    rng: random.Random
+    result: SessionResult
+
+
+# A policy returns the next action of a session, `None` ends the session
+Policy = Callable[[Context, random.Random], Action | None]
+
+
+def create_simulation(seed: int, config: Config | None = None) -> Simulation:
+    rng = random.Random(seed)
+    # Nothing is rendered, the screen only has to exist
+    ctx: Context = create_context(1, 1, rng)
+    return Simulation(ctx, config or Config(), rng, SessionResult(seed))
+
+
+def step(sim: Simulation, action: Action) -> None:
+    """Resolves `action` like a key press in the current game state, spins finish instantly.
+
+    `action` has to be one `get_action` can return in the current game state.
+    """
+    ctx: Context = sim.ctx
+    result: SessionResult = sim.result
+    coins_before: int = ctx.coins
+
+    ctx.last_played_hand = None
+    resolve_action(ctx, action, sim.config)
+    result.actions += 1
+
+    if ctx.game_state == GameState.SPINNING_SLOTS:
+        # Places every column where it stops, like the `SKIP_SPIN` action
+        skip_slots_spin(ctx)
+        ctx.game_state = GameState.SLOTS_POST_SPIN_COLUMN_PICKING
+
+        result.spins += 1
+        result.coins_spent += coins_before - ctx.coins
+
+    if ctx.last_played_hand is not None:
+        played_hand, coin_payout = ctx.last_played_hand
+        result.hands_played += 1
+        result.coins_won += coin_payout
+        result.hand_counts[played_hand] += 1
+
+
+def run_session(
+    seed: int,
+    policy: Policy,
+    config: Config | None = None,
+    max_actions: int = DEFAULT_MAX_ACTIONS,
+) -> SessionResult:
+    """Plays a session from `seed` until `policy` stops, the game is over or `max_actions`."""
+    sim: Simulation = create_simulation(seed, config)
+    ctx: Context = sim.ctx
+
+    for _ in range(max_actions):
+        if is_game_over(ctx):
+            break
+        action: Action | None = policy(ctx, sim.rng)
+        if action is None:
+            break
+        step(sim, action)
+
+    sim.result.coins = sim.ctx.coins
+    sim.result.score = sim.ctx.score
+    sim.result.game_over = is_game_over(sim.ctx)
+    return sim.result
+
+
+def is_game_over(ctx: Context) -> bool:
+    """Whether nothing is left to do, no cards to play and not enough coins to spin."""
+    return (
+        ctx.game_state == GameState.READY_TO_SPIN_SLOTS
+        and not ctx.hand.cards_in_hand
+        and not _can_spin(ctx)
+    )
+
+
+def legal_actions(ctx: Context) -> list[Action]:
+    """Returns every action a key press can trigger in the current game state."""
+    actions: list[Action] = []
+    for input in POLICY_INPUTS:
+        action: Action | None = get_action(ctx, input)
+        if action is not None and action not in actions:
+            actions.append(action)
+    return actions
+
+
+# --- Policies ---
+
+
+def random_policy(ctx: Context, rng: random.Random) -> Action | None:
+    """Picks any legal action."""
+    actions: list[Action] = legal_actions(ctx)
+    return rng.choice(actions) if actions else None
+
+
+def scripted_policy(actions: Iterable[Action]) -> Policy:
+    """Plays `actions` in order, the session ends once they run out."""
+    remaining = iter(actions)
+
+    def policy(ctx: Context, rng: random.Random) -> Action | None:
+        return next(remaining, None)
+
+    return policy
+
+
+def greedy_policy(play_at: int = 5) -> Policy:
+    """Spins until `play_at` cards are in hand, then plays its largest group of equal ranks.
+
+    Picks the highest ranked card out of the stopped columns and replaces the
+    lowest ranked card in hand when the hand is full.
+    """
+    # Targets are picked once per game state they're used in, the columns
+    # and the hand don't change until the column is picked or the hand played
+    best_column: int | None = None
+    to_play: list[int] | None = None
+
+    def policy(ctx: Context, rng: random.Random) -> Action | None:
+        nonlocal best_column, to_play
+        cards_in_hand: list[CardInHand] = ctx.hand.cards_in_hand
+        if ctx.game_state != GameState.SLOTS_POST_SPIN_COLUMN_PICKING:
+            best_column = None
+        if ctx.game_state != GameState.SELECTING_HAND_CARDS:
+            to_play = None
+
+        match ctx.game_state:
+            case GameState.READY_TO_SPIN_SLOTS:
+                if len(cards_in_hand) >= play_at or not _can_spin(ctx):
+                    return Action.FOCUS_HAND if cards_in_hand else None
+                return Action.SPIN_SLOTS
+
+            case GameState.SLOTS_POST_SPIN_COLUMN_PICKING:
+                if best_column is None:
+                    columns: list[Column] = ctx.slots.columns
+                    best_column = max(
+                        range(len(columns)), key=lambda i: _column_card(columns[i]).rank
+                    )
+                return _move_towards(
+                    ctx.slots.selected_column_index,
+                    best_column,
+                    Action.SLOTS_MOVE_SELECTION_LEFT,
+                    Action.SLOTS_MOVE_SELECTION_RIGHT,
+                    Action.SLOTS_PICK_CARD,
+                )
+
+            case GameState.SELECTING_HAND_CARDS:
+                if len(cards_in_hand) < play_at and _can_spin(ctx):
+                    return Action.FOCUS_SLOTS
+
+                if to_play is None:
+                    to_play = _largest_rank_group(cards_in_hand)
+                for index, card_in_hand in enumerate(cards_in_hand):
+                    wanted: bool = index in to_play
+                    if card_in_hand.is_selected == wanted:
+                        continue
+                    return _move_towards(
+                        ctx.hand.cursor_pos,
+                        index,
+                        Action.HAND_MOVE_SELECTION_LEFT,
+                        Action.HAND_MOVE_SELECTION_RIGHT,
+                        Action.HAND_SELECT_CARD if wanted else Action.HAND_DESELECT_CARD,
+                    )
+                to_play = None
+                return Action.PLAY_HAND
+
+            case GameState.FORCED_BURN_MODE:
+                lowest: int = min(
+                    range(len(cards_in_hand)), key=lambda i: cards_in_hand[i].card.rank
+                )
+                return _move_towards(
+                    ctx.hand.cursor_pos,
+                    lowest,
+                    Action.HAND_MOVE_SELECTION_LEFT,
+                    Action.HAND_MOVE_SELECTION_RIGHT,
+                    Action.BURN_CARD_FORCED,
+                )
+
+            case GameState.BURN_MODE:
+                return Action.EXIT_BURN_MODE
+
+        return None
+
+    return policy
+
+
+def _can_spin(ctx: Context) -> bool:
+    return ctx.coins > calc_spin_cost(ctx.slots.spin_count)
+
+
+def _column_card(column: Column) -> PlayingCard:
+    """Returns the card on the center row of a stopped column, the one `SLOTS_PICK_CARD` picks."""
+    return column.cards[int(column.cursor) % len(column.cards)]
+
+
+def _largest_rank_group(cards_in_hand: list[CardInHand]) -> list[int]:
+    """Returns the indices of the most common rank in hand, the highest rank on ties."""
+    rank_count: Counter = Counter(c.card.rank for c in cards_in_hand)
+    best_rank = max(rank_count, key=lambda rank: (rank_count[rank], rank))
+    return [i for i, c in enumerate(cards_in_hand) if c.card.rank == best_rank][:5]
+
+
+def _move_towards(
+    position: int, target: int, left: Action, right: Action, arrived: Action
+) -> Action:
+    if position > target:
+        return left
+    if position < target:
+        return right
+    return arrived
+
+
+# --- Running ---
+
+
+def run_sessions(
+    seeds: Iterable[int],
+    policy_factory: Callable[[], Policy],
+    config: Config | None = None,
+    max_actions: int = DEFAULT_MAX_ACTIONS,
+) -> list[SessionResult]:
+    """Runs a session per seed, each with a fresh policy from `policy_factory`."""
+    return [run_session(seed, policy_factory(), config, max_actions) for seed in seeds]
+
+
+def summarize_sessions(results: list[SessionResult]) -> dict[str, object]:
+    """Returns the means over `results`, the return to player and how often each hand was played."""
+    count: int = max(len(results), 1)
+    coins_spent: int = sum(r.coins_spent for r in results)
+    coins_won: int = sum(r.coins_won for r in results)
+    hand_counts: Counter[PokerHand] = sum((r.hand_counts for r in results), Counter())
+    hands_played: int = max(sum(hand_counts.values()), 1)
+
+    return {
+        "sessions": len(results),
+        "actions": sum(r.actions for r in results),
+        "mean_spins": sum(r.spins for r in results) / count,
+        "mean_hands_played": sum(r.hands_played for r in results) / count,
+        "mean_coins": sum(r.coins for r in results) / count,
+        "mean_score": sum(r.score for r in results) / count,
+        "game_over_rate": sum(r.game_over for r in results) / count,
+        # Coins won from played hands per coin spent on spins
+        "return_to_player": coins_won / coins_spent if coins_spent else 0.0,
+        "hand_frequency": {
+            hand.name.lower(): hand_counts[hand] / hands_played for hand in PokerHand
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-o", "--output", help="write the summary to this file instead of stdout")
+    parser.add_argument("--sessions", type=int, default=DEFAULT_SESSIONS)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first session")
+    parser.add_argument("--policy", choices=["greedy", "random"], default="greedy")
+    parser.add_argument(
+        "--play-at", type=int, default=5, help="hand size the greedy policy plays at"
+    )
+    parser.add_argument("--max-actions", type=int, default=DEFAULT_MAX_ACTIONS)
+    parser.add_argument("--sessions-output", help="also write every session result to this file")
+    args = parser.parse_args()
+
+    policy_factory: Callable[[], Policy] = (
+        (lambda: greedy_policy(args.play_at)) if args.policy == "greedy" else lambda: random_policy
+    )
+
+    started: float = time.perf_counter()
+    results: list[SessionResult] = run_sessions(
+        range(args.seed, args.seed + args.sessions),
+        policy_factory,
+        max_actions=args.max_actions,
+    )
+    elapsed: float = time.perf_counter() - started
+
+    summary: dict[str, object] = summarize_sessions(results)
+    summary["actions_per_sec"] = summary["actions"] / elapsed if elapsed > 0.0 else 0.0
+
+    if args.sessions_output:
+        with open(args.sessions_output, "w") as f:
+            json.dump(
+                [
+                    asdict(r)
+                    | {"hand_counts": {h.name.lower(): n for h, n in r.hand_counts.items()}}
+                    for r in results
+                ],
+                f,
+                indent=2,
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+    else:
+        json.dump(summary, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,96 @@
-import math
 import random
 from dataclasses import dataclass, field
 
+import numpy as np
+
 from term_slots.config import Config
 from term_slots.context import Context
+from term_slots.effects import (
+    Effect,
+    EffectRegion,
+    FrameUniforms,
+    apply_effects,
+    flicker_effect,
+    pulse_tint_effect,
+    row_darken_effect,
+    scale_effect,
+    tint_effect,
+)
 from term_slots.game_state import GameState
-from term_slots.playing_card import PlayingCard, render_card_small
-from term_slots.renderer import RGBA, DrawCall, RichText, lerp_rgb, mul_darken
+from term_slots.playing_card import PLAYING_CARD_WIDTH, PlayingCard, card_sprite_small
+from term_slots.renderer import (
+    RGBA,
+    DrawBatch,
+    DrawCall,
+    RichText,
+    compile_draw_calls,
+    concat_batches,
+    lerp_rgb,
+)
 
 SLOT_COLUMN_NEIGHBOR_COUNT = 3
+# Fraction of the spin duration left at which a column snaps to a stop
+SPIN_SNAP_THRESHOLD: float = 0.15
+# Row offsets of the visible cards from the center row, top to bottom
+ROW_OFFSETS: list[int] = list(range(-SLOT_COLUMN_NEIGHBOR_COUNT, SLOT_COLUMN_NEIGHBOR_COUNT + 1))
+
+# --- Column effects, rows are indexed from the top visible card ---
+
+# Base card background alpha
+CARD_BASE_EFFECT: Effect = scale_effect(1.0, 0.8)
+COLUMN_HIGHLIGHT_EFFECT: Effect = tint_effect(RGBA.GOLD, 0.0, 0.3)
+CENTER_ROW_PULSE_EFFECT: Effect = pulse_tint_effect(
+    RGBA.WHITE, 6.5, fg_amount=0.8, bg_amount=1.0, rows=(SLOT_COLUMN_NEIGHBOR_COUNT,)
+)
+_NEIGHBOR_DIM_SIGMA: float = 1.3
+_NEIGHBOR_DIM: np.ndarray = np.exp(
+    -(np.array(ROW_OFFSETS, dtype=np.float64) ** 2) / (2 * _NEIGHBOR_DIM_SIGMA**2)
+)
+FOCUSED_NEIGHBOR_DIM_EFFECT: Effect = row_darken_effect(_NEIGHBOR_DIM)
+# This trick lowers the brightness and contrast when unfocussed
+UNFOCUSED_NEIGHBOR_DIM_EFFECT: Effect = row_darken_effect(_NEIGHBOR_DIM * 0.1 + 0.05)
+
+# --- Spin flicker noise ---
+
+FLICKER_BG_SCALE_RANGE: tuple[float, float] = (0.85, 1.0)
+FLICKER_TEXT_MIX_RANGE: tuple[float, float] = (0.0, 1.0)
+
+
+@dataclass
+class FlickerNoise:
+    """Flicker values of a spinning card, indexed by `card_index + x + y` of its column.
+
+    Entry `seed` holds the first two values `random.Random(seed)` draws, so the
+    flicker of a card stays the same while it passes through the same spot.
+    """
+
+    bg_scales: np.ndarray  # shape (n,), dtype=float32
+    text_mixes: np.ndarray  # shape (n,), dtype=float32
+
+
+def build_flicker_noise(size: int) -> FlickerNoise:
+    bg_scales: np.ndarray = np.empty(size, dtype=np.float32)
+    text_mixes: np.ndarray = np.empty(size, dtype=np.float32)
+    for seed in range(size):
+        seeded_random = random.Random(seed)
+        bg_scales[seed] = seeded_random.uniform(*FLICKER_BG_SCALE_RANGE)
+        text_mixes[seed] = seeded_random.uniform(*FLICKER_TEXT_MIX_RANGE)
+    return FlickerNoise(bg_scales, text_mixes)
+
+
+# Covers a full deck on terminals up to ~900 cells wide and tall combined,
+# the table grows if a larger seed ever shows up
+FLICKER_NOISE: FlickerNoise = build_flicker_noise(1024)
+
+
+def lookup_flicker_noise(noise: FlickerNoise, seeds: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Returns the bg scales and text mixes of `seeds`, growing `noise` in place if needed."""
+    max_seed: int = int(seeds.max())
+    if max_seed >= len(noise.bg_scales):
+        grown: FlickerNoise = build_flicker_noise(max(max_seed + 1, 2 * len(noise.bg_scales)))
+        noise.bg_scales = grown.bg_scales
+        noise.text_mixes = grown.text_mixes
+    return noise.bg_scales[seeds], noise.text_mixes[seeds]
 
 
 @dataclass
@@ -27,6 +109,12 @@ class Column:
     spin_duration: float = 0.0
     spin_time_remaining: float = 0.0
     spin_speed: float = 0.0
+    # The cursor during a spin is a closed-form function of the time since
+    # `spin_start_time`, so it doesn't depend on the frame rate
+    spin_start_time: float = 0.0
+    spin_start_cursor: float = 0.0
+    # Where the cursor stops, known as soon as the spin starts
+    spin_stop_cursor: float = 0.0
 
 
 def calc_spin_cost(spin_count: int) -> int:
@@ -60,8 +148,30 @@ def calc_column_spin_duration_sec(col_index: int, cfg: Config) -> float:
     return duration + stagger
 
 
-def spin_slots_and_check_finished(ctx: Context, dt: float, max_spin_speed: float) -> bool:
-    """Mutates `ctx.slots`.
+def start_column_spin(
+    column: Column, duration: float, game_time: float, max_spin_speed: float
+) -> None:
+    """Starts spinning `column` for `duration` seconds and determines where it stops."""
+    column.spin_duration = duration
+    column.spin_time_remaining = duration
+    column.spin_start_time = game_time
+    column.spin_start_cursor = column.cursor
+    column.spin_stop_cursor = column.cursor - calc_spin_distance(
+        duration, duration, SPIN_SNAP_THRESHOLD, max_spin_speed
+    )
+
+
+def skip_slots_spin(ctx: Context) -> None:
+    """Jumps every spinning column straight to where it stops."""
+    for col in ctx.slots.columns:
+        col.cursor = col.spin_stop_cursor
+        col.spin_start_time = ctx.game_time - col.spin_duration
+        col.spin_time_remaining = 0.0
+        col.spin_speed = 0.0
+
+
+def spin_slots_and_check_finished(ctx: Context, max_spin_speed: float) -> bool:
+    """Mutates `ctx.slots`, placing every column where it is at `ctx.game_time`.
 
     Returns `True` once the spinning finishes or if it never starts.
     """
@@ -72,22 +182,26 @@ def spin_slots_and_check_finished(ctx: Context, dt: float, max_spin_speed: float
 
     col_finished: int = 0
     for col in ctx.slots.columns:
-        col.spin_time_remaining = max(0.0, col.spin_time_remaining - dt)
+        elapsed: float = ctx.game_time - col.spin_start_time
+        col.spin_time_remaining = max(0.0, col.spin_duration - elapsed)
         col.spin_speed = calc_spin_speed(
             col.spin_duration,
             col.spin_time_remaining,
-            snap_threshold=0.15,
+            snap_threshold=SPIN_SNAP_THRESHOLD,
             max_spin_speed=max_spin_speed,
         )
 
-        col.cursor -= col.spin_speed * dt
-
-        # `ctx.spin_speed` will always be equal to 0.0
-        # when `ctx.spin_time_remaining` is equal to 0.0
+        # `col.spin_speed` will always be equal to 0.0
+        # once the column snaps to a stop
         spin_stopped: bool = col.spin_speed == 0.0
         if spin_stopped:
+            col.cursor = col.spin_stop_cursor
             col.spin_time_remaining = 0.0
             col_finished += 1
+        else:
+            col.cursor = col.spin_start_cursor - calc_spin_distance(
+                col.spin_duration, elapsed, SPIN_SNAP_THRESHOLD, max_spin_speed
+            )
 
     if col_finished == len(ctx.slots.columns):
         return True
@@ -95,7 +209,18 @@ def spin_slots_and_check_finished(ctx: Context, dt: float, max_spin_speed: float
     return False
 
 
-def render_slots(x: int, y: int, ctx: Context, game_time: float) -> list[DrawCall]:
+def calc_slots_frame_rate(ctx: Context, config: Config) -> float:
+    """Returns the frame rate the slots need to animate, `0.0` when they're static."""
+    if ctx.game_state == GameState.SPINNING_SLOTS:
+        return config.max_fps
+    if ctx.game_state == GameState.SLOTS_POST_SPIN_COLUMN_PICKING:
+        # Sinewave center row highlight of the selected column
+        return config.highlight_fps
+    return 0.0
+
+
+def render_slots(x: int, y: int, ctx: Context, uniforms: FrameUniforms) -> list[DrawBatch]:
+    batches: list[DrawBatch] = []
     draw_calls: list[DrawCall] = []
     all_focussed_game_states: list[GameState] = [
         GameState.READY_TO_SPIN_SLOTS,
@@ -112,12 +237,12 @@ def render_slots(x: int, y: int, ctx: Context, game_time: float) -> list[DrawCal
 
         col_x: int = x + col_index * x_spacing
         col_y: int = y
-        draw_calls.extend(
+        batches.append(
             render_column(
                 col_x,
                 col_y,
                 col,  # pyright: ignore
-                game_time,
+                uniforms,
                 slots_are_focused,
                 column_is_selected=is_game_state_picking and col_is_selected,
             )
@@ -151,82 +276,55 @@ def render_slots(x: int, y: int, ctx: Context, game_time: float) -> list[DrawCal
             draw_calls.append(DrawCall(arrow_x, top_arrow_y, RichText("▴", column_indicator_color)))
             draw_calls.append(DrawCall(arrow_x, bot_arrow_y, RichText("▾", column_indicator_color)))
 
-    return draw_calls
+    # Indicators never overlap the cards, so they can all be drawn last
+    batches.append(compile_draw_calls(draw_calls))
+
+    return batches
 
 
 def render_column(
     x: int,
     y: int,
     column: Column,
-    game_time: float,
+    uniforms: FrameUniforms,
     slots_are_focused: bool,
     column_is_selected: bool,
-) -> list[DrawCall]:
+) -> DrawBatch:
     def get_card_index(row_offset: int, column: Column) -> int:
         """Retrieves the wrapped card index from the column."""
         index: int = int(column.cursor + row_offset)
         wrapped_index: int = index % len(column.cards)
         return wrapped_index
 
-    draw_calls: list[DrawCall] = []
-
-    for row_offset in range(
-        -SLOT_COLUMN_NEIGHBOR_COUNT,
-        SLOT_COLUMN_NEIGHBOR_COUNT + 1,
-    ):
-        is_center_row: bool = row_offset == 0
-
-        card_x: int = x
-        card_y: int = y + row_offset
-        card_index: int = get_card_index(row_offset, column)
-        card: PlayingCard = column.cards[card_index]
-
-        card_draw_call: DrawCall = render_card_small(card_x, card_y, card)
-        rt: RichText = card_draw_call.rich_text
-
-        # Base card background alpha
-        if rt.bg_color:
-            rt.bg_color = lerp_rgb(RGBA.BLACK, rt.bg_color, 0.8)
-
-        # Column center row highlight during picking phase
-        if column_is_selected and rt.bg_color:
-            # Column Highlight
-            rt.bg_color = lerp_rgb(rt.bg_color, RGBA.GOLD, 0.3)
-
-            # Sinewave center row highlight
-            if is_center_row:
-                amplitude: float = 1.0
-                frequency: float = 6.5
-                t: float = 0.5 + 0.5 * amplitude * math.sin(frequency * game_time)
-
-                rt.bg_color = lerp_rgb(rt.bg_color, RGBA.WHITE, t)
-                rt.text_color = lerp_rgb(rt.text_color, RGBA.WHITE, t * 0.8)
-
-        # Multiplying by random alpha while spinning
-        col_is_spinning: bool = column.spin_time_remaining > 0.0
-        if col_is_spinning and rt.bg_color:
-            seeded_random = random.Random(card_index + x + y)
-            rt.bg_color *= seeded_random.uniform(0.85, 1.0)
-            rt.text_color = lerp_rgb(
-                rt.bg_color,
-                rt.text_color,
-                seeded_random.uniform(0.0, 1.0),
-            )
+    card_indices: list[int] = [get_card_index(row_offset, column) for row_offset in ROW_OFFSETS]
+    sprites: DrawBatch = concat_batches(
+        [
+            card_sprite_small(x, y + row_offset, column.cards[card_index])
+            for row_offset, card_index in zip(ROW_OFFSETS, card_indices)
+        ]
+    )
 
-        # Alpha dimming of neighbors using a gaussian curve
-        sigma: float = 1.3
-        alpha: float = math.exp(-(row_offset**2) / (2 * sigma**2))
+    effects: list[Effect] = [CARD_BASE_EFFECT]
 
-        if not slots_are_focused:
-            # This trick lowers the brightness and contrast when unfocussed
-            alpha = alpha * 0.1 + 0.05
+    # Column center row highlight during picking phase
+    if column_is_selected:
+        effects.append(COLUMN_HIGHLIGHT_EFFECT)
+        effects.append(CENTER_ROW_PULSE_EFFECT)
 
-        rt = mul_darken(rt, alpha)
+    # Multiplying by random alpha while spinning
+    col_is_spinning: bool = column.spin_time_remaining > 0.0
+    if col_is_spinning:
+        seeds: np.ndarray = np.array(card_indices, dtype=np.int64) + (x + y)
+        bg_scales, text_mixes = lookup_flicker_noise(FLICKER_NOISE, seeds)
+        effects.append(flicker_effect(bg_scales, text_mixes))
 
-        card_draw_call.rich_text = rt
-        draw_calls.append(card_draw_call)
+    # Alpha dimming of neighbors using a gaussian curve
+    effects.append(
+        FOCUSED_NEIGHBOR_DIM_EFFECT if slots_are_focused else UNFOCUSED_NEIGHBOR_DIM_EFFECT
+    )
 
-    return draw_calls
+    region = EffectRegion(x, y - SLOT_COLUMN_NEIGHBOR_COUNT, PLAYING_CARD_WIDTH, len(ROW_OFFSETS))
+    return apply_effects(sprites, region, effects, uniforms)
 
 
 def calc_spin_speed(
@@ -243,3 +341,20 @@ def calc_spin_speed(
 
     # easing curve
     return max_spin_speed * (1 - (1 - time_normalized) ** exponent)
+
+
+def calc_spin_distance(
+    duration: float, elapsed: float, snap_threshold: float, max_spin_speed: float
+) -> float:
+    """Distance covered `elapsed` seconds into a spin, the integral of `calc_spin_speed`.
+
+    With `u = elapsed / duration` the speed is `max_spin_speed * (1 - u**6)`
+    until it snaps to 0.0 at `u = 1 - snap_threshold`.
+    """
+    exponent = 6
+
+    if duration <= 0.0:
+        return 0.0
+
+    u: float = max(0.0, min(elapsed / duration, 1.0 - snap_threshold))
+    return max_spin_speed * duration * (u - u ** (exponent + 1) / (exponent + 1))
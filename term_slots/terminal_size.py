@@ -0,0 +1,54 @@
+import signal
+import time
+from dataclasses import dataclass
+
+from blessed import Terminal
+
+
+@dataclass
+class TerminalSize:
+    """Terminal size cached between resizes, so it isn't queried every frame."""
+
+    width: int
+    height: int
+    # Set from the SIGWINCH handler once the terminal reports a resize
+    resized: bool = False
+    # Without SIGWINCH (e.g. on Windows) the size is polled at `poll_interval` instead
+    signal_driven: bool = False
+    poll_interval: float = 0.25
+    next_poll: float = 0.0
+
+
+def watch_terminal_size(size: TerminalSize) -> None:
+    """Installs a SIGWINCH handler flagging `size` for an update, must run on the main thread."""
+    if not hasattr(signal, "SIGWINCH"):
+        return
+
+    def on_resize(signum: int, frame: object) -> None:
+        # Only flag the resize, querying the terminal isn't safe inside a signal handler
+        size.resized = True
+
+    signal.signal(signal.SIGWINCH, on_resize)
+    size.signal_driven = True
+
+
+def poll_terminal_size(term: Terminal, size: TerminalSize) -> bool:
+    """Updates `size` if the terminal may have been resized, returns whether it changed."""
+    if size.signal_driven:
+        if not size.resized:
+            return False
+        size.resized = False
+    else:
+        now: float = time.perf_counter()
+        if now < size.next_poll:
+            return False
+        size.next_poll = now + size.poll_interval
+
+    width: int = term.width
+    height: int = term.height
+    if (width, height) == (size.width, size.height):
+        return False
+
+    size.width = width
+    size.height = height
+    return True
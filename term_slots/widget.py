@@ -0,0 +1,32 @@
+from dataclasses import dataclass
+from typing import Callable
+
+from term_slots.config import Config
+from term_slots.context import Context
+from term_slots.renderer import DrawBatch, DrawCall, compile_draw_calls
+
+
+@dataclass
+class Widget:
+    """Retained UI element whose compiled cells are cached until its inputs change.
+
+    `get_inputs` returns everything `render` depends on, compared with `==`
+    against the inputs of the previous frame. Inputs have to be immutable
+    values, a mutable object edited in place still compares equal to itself.
+    """
+
+    render: Callable[[Context, Config], list[DrawCall]]
+    get_inputs: Callable[[Context, Config], object]
+    cached_inputs: object = None
+    cached_batch: DrawBatch | None = None
+
+
+def render_widget(widget: Widget, ctx: Context, config: Config) -> DrawBatch:
+    inputs: object = widget.get_inputs(ctx, config)
+
+    if widget.cached_batch is not None and inputs == widget.cached_inputs:
+        return widget.cached_batch
+
+    widget.cached_inputs = inputs
+    widget.cached_batch = compile_draw_calls(widget.render(ctx, config))
+    return widget.cached_batch
@@ -0,0 +1,49 @@
+import time
+
+from term_slots.config import Config
+from term_slots.headless import create_headless_backend, headless_tick
+from term_slots.main import calc_frame_rate, create_context
+from term_slots.output import FrameWriter
+
+
+def test_idle_screen_needs_no_frames():
+    backend = create_headless_backend(100, 40, emulate=False)
+    ctx = create_context(100, 40)
+    config = Config()
+
+    headless_tick(backend, ctx, config, 1 / 60)
+
+    assert not ctx.render_skipped
+    assert calc_frame_rate(ctx, config) == 0.0
+
+
+def test_skipped_frame_keeps_max_fps_until_rendered():
+    backend = create_headless_backend(100, 40, emulate=False)
+    ctx = create_context(100, 40)
+    config = Config()
+
+    ctx.output_monitor.busy_until = time.perf_counter() + 60.0
+    headless_tick(backend, ctx, config, 1 / 60)
+
+    assert ctx.render_skipped
+    assert calc_frame_rate(ctx, config) == config.max_fps
+
+    ctx.output_monitor.busy_until = 0.0
+    headless_tick(backend, ctx, config, 1 / 60)
+
+    assert not ctx.render_skipped
+    assert calc_frame_rate(ctx, config) == 0.0
+
+
+def test_occupied_writer_slot_keeps_max_fps():
+    backend = create_headless_backend(100, 40, emulate=False)
+    ctx = create_context(100, 40)
+    config = Config()
+    # No thread is started, so the frame stays in the slot
+    ctx.frame_writer = FrameWriter(backend.term.stream, ctx.output_monitor, pending=b"frame")
+
+    headless_tick(backend, ctx, config, 1 / 60)
+
+    assert ctx.render_skipped
+    assert ctx.frame_writer.frames_dropped == 1
+    assert calc_frame_rate(ctx, config) == config.max_fps
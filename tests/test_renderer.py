@@ -0,0 +1,25 @@
+from term_slots.config import Config
+from term_slots.headless import create_headless_backend, headless_tick
+from term_slots.main import create_context
+from term_slots.renderer import RGBA, Screen, buffer_diff, fill_screen_background
+
+
+def test_first_diff_covers_full_screen():
+    screen = Screen(100, 40)
+    fill_screen_background(screen.new_buffer, RGBA.BLACK)
+
+    diffs = buffer_diff(screen)
+
+    assert {(y, x) for y, x, _ in diffs} == {(y, x) for y in range(40) for x in range(100)}
+
+
+def test_first_frame_paints_every_cell():
+    backend = create_headless_backend(100, 40)
+    ctx = create_context(100, 40)
+    fill_screen_background(ctx.screen.new_buffer, RGBA.BLACK)
+
+    first = headless_tick(backend, ctx, Config(), 1 / 60)
+    second = headless_tick(backend, ctx, Config(), 1 / 60)
+
+    assert first.cells_written == 100 * 40
+    assert second.cells_written < first.cells_written